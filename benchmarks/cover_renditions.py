@@ -0,0 +1,119 @@
+"""
+Compares saving a downloaded cover the old way with making its renditions.
+
+Usage:
+    python -m benchmarks.cover_renditions [cover.jpg ...] [--runs N]
+        [--format jpeg|webp] [--quality Q]
+
+Covers default to benchmarks/fixtures/*.jpg, falling back to synthetic
+JPEGs at typical full-size cover dimensions. Memory is the size of the
+largest bitmap each path decodes, which is where Pillow spends it; the
+allocation happens in C, out of tracemalloc's sight.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from utils.books.renditions import RENDITIONS, decode, make_renditions
+from utils.common.constants import COVER_FORMATS, COVER_QUALITY
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def synthetic_cover(width, height):
+    """A JPEG with gradients and text, so it compresses like a real cover."""
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for i in range(0, height, max(height // 40, 1)):
+        draw.line([(0, i), (width, height - i)], fill=(i % 256, 80, 160), width=3)
+        draw.text((width // 10, i), "The Left Hand of Darkness", fill=(255, 255, 255))
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def old_save(data):
+    """What _save_cover_to_cache did: full decode, distorting resize, one JPEG."""
+    image = Image.open(BytesIO(data))
+    resized = image.resize((400, 600), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    resized.convert("RGB").save(buffer, format="JPEG")
+    return {"detail": (buffer.getvalue(), 400, 600)}
+
+
+def decoded_bytes(data, reduced):
+    largest = max(RENDITIONS.values(), key=lambda box: box[0] * box[1])
+    decoded = decode(data, largest, reduced)
+    return decoded.width * decoded.height * len(decoded.getbands())
+
+
+def measure(save, data, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        renditions = save(data)
+        times.append(time.perf_counter() - started)
+    return renditions, statistics.median(times)
+
+
+def run(covers, runs, format="jpeg", quality=COVER_QUALITY):
+    for name, data in covers:
+        with Image.open(BytesIO(data)) as image:
+            size = image.size
+        print(f"\n{name} ({size[0]}x{size[1]}, {len(data) / 1024:.0f} KiB)")
+        # The speedup is measured against making the same renditions from a full decode
+        paths = [
+            (
+                "renditions, full decode",
+                lambda data: make_renditions(data, reduced=False, format=format, quality=quality),
+                False,
+            ),
+            (
+                "renditions, draft/reduce",
+                lambda data: make_renditions(data, format=format, quality=quality),
+                True,
+            ),
+            ("old 400x600 resize", old_save, False),
+        ]
+        baseline = None
+        for label, save, reduced in paths:
+            renditions, seconds = measure(save, data, runs)
+            decoded = decoded_bytes(data, reduced)
+            baseline = baseline or (seconds, decoded)
+            stored = ", ".join(
+                f"{rendition} {width}x{height} {len(image_data) / 1024:.0f} KiB"
+                for rendition, (image_data, width, height) in renditions.items()
+            )
+            print(
+                f"  {label:<26} {seconds * 1000:7.2f} ms  {baseline[0] / seconds:5.1f}x"
+                f"  decoded {decoded / 1024 / 1024:6.2f} MiB"
+                f" ({baseline[1] / decoded:4.1f}x less)  [{stored}]"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("covers", nargs="*", type=Path)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--format", choices=list(COVER_FORMATS), default="jpeg")
+    parser.add_argument("--quality", type=int, default=COVER_QUALITY)
+    args = parser.parse_args(argv)
+
+    paths = args.covers or sorted(FIXTURES.glob("*.jpg"))
+    covers = [(path.name, path.read_bytes()) for path in paths]
+    if not covers:
+        covers = [
+            (f"synthetic {width}x{height}", synthetic_cover(width, height))
+            for width, height in [(475, 700), (1000, 1500), (2000, 3000)]
+        ]
+    run(covers, args.runs, args.format, args.quality)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
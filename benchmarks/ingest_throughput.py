@@ -0,0 +1,150 @@
+"""
+Runs batches through BatchIngester against a local stand-in for Goodreads.
+
+Usage:
+    python -m benchmarks.ingest_throughput [--books N] [--runs N]
+        [--max-per-host N] [--workers N] [--latency MS] [--rate R]
+
+Book pages and covers are served by an http.server on localhost that waits
+--latency before answering, so throughput depends on how many requests the
+client keeps in flight. Each run uses new ISBNs, so none is answered from
+the metadata cache. The script checks that no more than --max-per-host
+requests were ever in flight at once, and that each run reports the
+requests the stand-in saw during that run. It exits with status 1 when a
+check fails. Books are added to a profile in a temporary directory.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from PIL import Image
+
+
+def isbn13(n):
+    digits = f"978{n:09d}"
+    total = sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+
+class StandIn(ThreadingHTTPServer):
+    """Serves minimal book pages and covers, counting requests and the most in flight."""
+
+    daemon_threads = True
+
+    def __init__(self, latency):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak = 0
+        buffer = BytesIO()
+        Image.new("RGB", (475, 700), (90, 60, 140)).save(buffer, format="JPEG")
+        self.cover = buffer.getvalue()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        time.sleep(server.latency)
+        # Counted out before answering: the client frees its slot once it has
+        # read the response, and may send the next request before this returns
+        with server.lock:
+            server.in_flight -= 1
+        if self.path.startswith("/cover/"):
+            body, content_type = server.cover, "image/jpeg"
+        else:
+            isbn = self.path.rstrip("/").rsplit("/", 1)[-1]
+            body = (
+                f'<h1 data-testid="bookTitle">Book {isbn}</h1>'
+                '<span class="ContributorLink__name">Stand-in Author</span>'
+                '<div class="RatingStatistics__rating">4.1</div>'
+                '<p data-testid="pagesFormat">320 pages, Paperback</p>'
+                '<div class="BookCover__image"><img class="ResponsiveImage"'
+                f' src="{server.base_url}/cover/{isbn}.jpg"></div>'
+            ).encode()
+            content_type = "text/html"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run(args):
+    # Imported here so the data directory is already the temporary one
+    from utils.books.ingest import BatchIngester
+    from utils.books.scraping import GoodreadsClient
+
+    server = StandIn(args.latency / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = GoodreadsClient(
+        base_url=server.base_url,
+        max_per_host=args.max_per_host,
+        rate=args.rate,
+        burst=args.max_per_host,
+    )
+    ok = True
+    try:
+        for run_index in range(args.runs):
+            first = run_index * args.books
+            queries = [isbn13(n) for n in range(first, first + args.books)]
+            served_before = server.requests
+            summary = BatchIngester(client, max_workers=args.workers).run(queries)
+            served = server.requests - served_before
+            print(
+                f"run {run_index + 1}: {summary['added']} added, {len(summary['failed'])} failed"
+                f" in {summary['elapsed']:.2f}s, {summary['requests']} requests"
+                f" ({served} served), {summary['throughput']:.1f} requests/s"
+            )
+            if summary["requests"] != served:
+                print(f"  FAIL: reported {summary['requests']} requests, the stand-in saw {served}")
+                ok = False
+            if summary["failed"]:
+                print(f"  FAIL: {summary['failed'][0]}")
+                ok = False
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"peak in flight: {server.peak} (limit {args.max_per_host})")
+    if server.peak > args.max_per_host:
+        print("  FAIL: the per-host limit was exceeded")
+        ok = False
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--books", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument("--max-per-host", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=20, help="milliseconds")
+    parser.add_argument("--rate", type=float, default=1000, help="requests per second")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = os.environ["APPDATA"] = home
+        return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Compares the Goodreads book page parsers on saved pages.
+
+Usage:
+    python -m benchmarks.parse_book_page [page.html ...]
+    python -m benchmarks.parse_book_page --save https://www.goodreads.com/book/show/...
+
+Pages default to benchmarks/fixtures/*.html. --save downloads a page there.
+Without any saved page a synthetic one of realistic size is used, once with
+its embedded data and once stripped down to plain HTML.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from utils.books.page_parser import HTML_PARSER, parse_book_page, parse_html
+from utils.books.scraping import GoodreadsClient
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def synthetic_page(embedded=True, recommendations=300):
+    """A page shaped like a Goodreads book page, with recommendations and embedded data."""
+    state = {
+        "ROOT_QUERY": {'getBookByLegacyId({"legacyId":"1"})': {"__ref": "Book:1"}},
+        "Book:1": {
+            "title": "The Left Hand of Darkness",
+            "imageUrl": "https://images.example/covers/1.jpg",
+            "primaryContributorEdge": {"node": {"__ref": "Contributor:1"}},
+            "details": {"numPages": 304, "format": "Paperback"},
+            "work": {"__ref": "Work:1"},
+            "description": "Lorem ipsum dolor sit amet. " * 40,
+        },
+        "Contributor:1": {"name": "Ursula K. Le Guin"},
+        "Work:1": {"stats": {"averageRating": 4.09, "ratingsCount": 215000}},
+    }
+    cards = []
+    for i in range(2, recommendations + 2):
+        state[f"Book:{i}"] = {
+            "title": f"Recommended {i}",
+            "imageUrl": f"https://images.example/covers/{i}.jpg",
+            "details": {"numPages": 200 + i},
+            "description": "Consectetur adipiscing elit. " * 10,
+        }
+        cards.append(
+            f'<div class="BookCard"><a href="/book/show/{i}">'
+            f'<img class="ResponsiveImage" src="https://images.example/covers/{i}.jpg"></a>'
+            f'<span class="Text Text__title3">Recommended {i}</span>'
+            f'<span class="ContributorLink__name">Someone {i}</span></div>'
+        )
+    scripts = ""
+    if embedded:
+        json_ld = {
+            "@context": "https://schema.org",
+            "@type": "Book",
+            # Goodreads puts the series in the JSON-LD name, and only there
+            "name": "The Left Hand of Darkness (Hainish Cycle, #4)",
+            "image": "https://images.example/covers/1.jpg",
+            "numberOfPages": 304,
+            "author": [{"@type": "Person", "name": "Ursula K. Le Guin"}],
+            "aggregateRating": {"@type": "AggregateRating", "ratingValue": 4.09},
+        }
+        next_data = {"props": {"pageProps": {"apolloState": state}}}
+        scripts = (
+            f'<script type="application/ld+json">{json.dumps(json_ld)}</script>'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+        )
+    return (
+        "<!DOCTYPE html><html><head><title>Book</title></head><body>"
+        + '<nav class="SiteHeader">' + '<a class="Link">Browse</a>' * 200 + "</nav>"
+        + '<div class="BookPage__leftColumn"><div class="BookCover__image">'
+        + '<img class="ResponsiveImage" src="https://images.example/covers/1.jpg"></div></div>'
+        + '<div class="BookPageTitleSection__title">'
+        + '<h1 data-testid="bookTitle" class="Text Text__title1">The Left Hand of Darkness</h1></div>'
+        + '<span class="ContributorLink__name">Ursula K. Le Guin</span>'
+        + '<div class="RatingStatistics__rating">4.09</div>'
+        + '<div class="FeaturedDetails"><p data-testid="pagesFormat">304 pages, Paperback</p></div>'
+        + "<section>" + "<p>Lorem ipsum <b>dolor</b> sit amet.</p>" * 2000 + "</section>"
+        + "".join(cards)
+        + scripts
+        + "</body></html>"
+    )
+
+
+def measure(parse, page, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = parse(page)
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    parse(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, statistics.median(times), peak
+
+
+def run(pages, runs):
+    parsers = [
+        ("full html.parser tree", lambda page: parse_html(page, strained=False)),
+        (f"strained {HTML_PARSER}", parse_html),
+        ("parse_book_page", parse_book_page),
+    ]
+    for name, page in pages:
+        print(f"\n{name} ({len(page) / 1024:.0f} KiB)")
+        baseline = expected = None
+        for label, parse in parsers:
+            result, seconds, peak = measure(parse, page, runs)
+            if baseline is None:
+                baseline, expected = seconds, result
+            same = "" if result == expected else "  (differs from baseline)"
+            print(
+                f"  {label:<24} {seconds * 1000:8.2f} ms  {baseline / seconds:6.1f}x"
+                f"  peak {peak / 1024 / 1024:6.2f} MiB{same}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("pages", nargs="*", type=Path)
+    parser.add_argument("--save", metavar="URL", help="download a book page into fixtures")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.save:
+        FIXTURES.mkdir(exist_ok=True)
+        path = FIXTURES / (args.save.rstrip("/").rsplit("/", 1)[-1] + ".html")
+        path.write_text(GoodreadsClient()._get(args.save).text, encoding="utf-8")
+        print(f"Saved {path}")
+        return
+
+    paths = args.pages or sorted(FIXTURES.glob("*.html"))
+    pages = [(path.name, path.read_text(encoding="utf-8")) for path in paths]
+    if not pages:
+        pages = [
+            ("synthetic page", synthetic_page()),
+            ("synthetic page without embedded data", synthetic_page(embedded=False)),
+        ]
+    run(pages, args.runs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
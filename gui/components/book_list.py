@@ -1,14 +1,20 @@
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtWidgets import (QDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton,
                             QTableWidget, QTableWidgetItem, QVBoxLayout, QListWidget,
                             QWidget, QLineEdit, QInputDialog, QStyledItemDelegate,
                             QMenu, QCalendarWidget, QMessageBox)
 from PyQt6.QtGui import QAction
 
+from utils.books.refresh import RatingRefresher
 from utils.books.selection import calculate_book_score, calculate_scores
+from utils.core.async_db import async_search_ids
+from utils.core.config import load_config
 from utils.core.dates import get_current_date
-from utils.core.db import read_db, write_db
+from utils.core.db import BOOK_COLUMNS, get_job_state, split_tags
 from utils.core.isbn import validate_isbn
+from utils.core.misc import load_misc_settings
+
+from .workers import RefreshWorker
 
 class TagItemDelegate(QStyledItemDelegate):
     def __init__(self, table_widget, parent=None):
@@ -35,7 +41,7 @@ class TagEditorDialog(QDialog):
         self.setModal(True)
         self.setMinimumWidth(300)
         
-        self.tags = [tag.strip() for tag in tags_str.split(",")] if tags_str else []
+        self.tags = split_tags(tags_str)
         
         layout = QVBoxLayout(self)
         
@@ -129,7 +135,7 @@ class BookTableItem(QTableWidgetItem):
             if role == Qt.ItemDataRole.EditRole:
                 # Store the actual tags string but display the count
                 self.original_text = value
-                self.tags_list = [tag.strip() for tag in value.split(",")] if value else []
+                self.tags_list = split_tags(value)
                 tag_count = len(self.tags_list) if self.tags_list else 0
                 display_text = self.tags_list[0] if tag_count == 1 else f"{tag_count} tags"
                 super().setData(Qt.ItemDataRole.DisplayRole, display_text)
@@ -278,7 +284,9 @@ def populate_table(table, books):
     table.setRowCount(len(books))
 
     for row, book in enumerate(books):
-        table.setItem(row, 0, QTableWidgetItem(book["title"]))
+        title_item = QTableWidgetItem(book["title"])
+        title_item.setData(Qt.ItemDataRole.UserRole, book.get("id"))
+        table.setItem(row, 0, title_item)
         table.setItem(row, 1, QTableWidgetItem(book["author"]))
 
         # Use custom table item for ISBN
@@ -326,17 +334,48 @@ def populate_table(table, books):
 class BookListWidget(QWidget):
     saved = pyqtSignal()
 
-    def __init__(self, profile_manager=None):
+    SEARCH_DELAY_MS = 150
+
+    def __init__(self, profile_manager=None, repository=None, client=None):
         super().__init__()
         self.profile_manager = profile_manager
+        self.repository = repository
+        # The app's GoodreadsClient, shared by the rating refresh
+        self.client = client
         self.calculate_scores = calculate_scores
         self.calculate_book_score = calculate_book_score
+        self._refresh_worker = None
         self._init_ui()
 
+        if self.repository:
+            self.repository.reset.connect(self._on_reset)
+            self.repository.book_added.connect(self.add_book)
+            self.repository.book_updated.connect(self._on_book_updated)
+            self.repository.book_removed.connect(self._on_book_removed)
+            for signal in [
+                self.repository.reset,
+                self.repository.book_added,
+                self.repository.book_updated,
+            ]:
+                signal.connect(self._refresh_search)
+
     def _init_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(18, 18, 18, 18)
 
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search title, author, tags or ISBN...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self._schedule_search)
+        layout.addWidget(self.search_input)
+
+        # Debounce so a burst of keystrokes runs a single query
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._run_search)
+        self._search_generation = 0
+
         layout.addWidget(QLabel("Available Books"))
         self.unselected_table = create_book_table(include_date_added=True)
         self.unselected_table.customContextMenuRequested.connect(self._show_unselected_context_menu)
@@ -360,6 +399,16 @@ class BookListWidget(QWidget):
         button_layout.addWidget(self.save_btn)
         layout.addLayout(button_layout)
 
+        refresh_layout = QHBoxLayout()
+        self.refresh_status = QLabel("")
+        self.refresh_status.setStyleSheet("color: #888;")
+        self.refresh_btn = QPushButton()
+        self.refresh_btn.clicked.connect(self._toggle_refresh)
+        refresh_layout.addWidget(self.refresh_status, 1)
+        refresh_layout.addWidget(self.refresh_btn)
+        layout.addLayout(refresh_layout)
+        self._update_refresh_button()
+
     def closeEvent(self, event):
         if hasattr(self, "unselected_table"):
             self.unselected_table.clear()
@@ -373,8 +422,74 @@ class BookListWidget(QWidget):
             self.add_btn.deleteLater()
         if hasattr(self, "save_btn"):
             self.save_btn.deleteLater()
+        self.stop_refresh()
         super().closeEvent(event)
 
+    def _refresh_profile(self):
+        return self.repository.profile if self.repository else None
+
+    def _update_refresh_button(self):
+        if self._refresh_worker and self._refresh_worker.isRunning():
+            self.refresh_btn.setText("Stop Refresh")
+            return
+        try:
+            checkpoint = get_job_state(RatingRefresher.JOB, self._refresh_profile())
+        except Exception as e:
+            print(f"Error reading refresh checkpoint: {e}")
+            checkpoint = None
+        if checkpoint:
+            self.refresh_btn.setText("Resume Refresh")
+            self.refresh_status.setText(
+                f"Rating refresh paused at {checkpoint['checked']}/{checkpoint['total']}"
+            )
+        else:
+            self.refresh_btn.setText("Refresh Ratings")
+
+    def _toggle_refresh(self):
+        if self._refresh_worker and self._refresh_worker.isRunning():
+            self._refresh_worker.stop()
+            self.refresh_btn.setEnabled(False)
+            self.refresh_status.setText("Stopping after the current book...")
+            return
+
+        rate = load_misc_settings()["refresh_rate"]
+        self._refresh_worker = RefreshWorker(self._refresh_profile(), rate, self.client, self)
+        self._refresh_worker.progress.connect(self._on_refresh_progress)
+        self._refresh_worker.batch_written.connect(self._on_refresh_batch)
+        self._refresh_worker.completed.connect(self._on_refresh_finished)
+        self._refresh_worker.start()
+        self.refresh_btn.setText("Stop Refresh")
+        self.refresh_status.setText(f"Refreshing ratings ({rate:g} requests/min)...")
+
+    def _on_refresh_progress(self, checked, total, title, error):
+        status = f"Refreshing ratings {checked}/{total}: {title}"
+        self.refresh_status.setText(f"{status} ({error})" if error else status)
+
+    def _on_refresh_batch(self, updates):
+        # Ignore batches for a profile that is no longer shown
+        if self.repository and self._refresh_worker.profile == self.repository.profile:
+            self.repository.merge_changes({"update": updates})
+
+    def _on_refresh_finished(self, summary):
+        self.refresh_btn.setEnabled(True)
+        failed = f", {len(summary['failed'])} not found" if summary["failed"] else ""
+        if summary["finished"]:
+            self.refresh_status.setText(
+                f"Ratings refreshed: {summary['updated']} of {summary['checked']} "
+                f"books changed{failed}"
+            )
+        else:
+            self.refresh_status.setText(
+                f"Rating refresh paused at {summary['checked']}/{summary['total']}{failed}"
+            )
+        self._update_refresh_button()
+
+    def stop_refresh(self):
+        """Stops a running refresh; its checkpoint lets it resume next time."""
+        if self._refresh_worker and self._refresh_worker.isRunning():
+            self._refresh_worker.stop()
+            self._refresh_worker.wait()
+
     def _setup_default_sorting(self):
         self.unselected_table.sortItems(7, Qt.SortOrder.DescendingOrder)
         self.selected_table.sortItems(7, Qt.SortOrder.DescendingOrder)
@@ -425,7 +540,10 @@ class BookListWidget(QWidget):
     
     def _extract_book_data(self, table, row):
         """Extract book data from a table row"""
+        book_id = table.item(row, 0).data(Qt.ItemDataRole.UserRole) if table.item(row, 0) else None
+        stored = self.repository.get(book_id) if self.repository and book_id is not None else None
         book = {
+            "id": book_id,
             "title": table.item(row, 0).text() if table.item(row, 0) else "",
             "author": table.item(row, 1).text() if table.item(row, 1) else "",
             "isbn": table.item(row, 2).text() if table.item(row, 2) else "",
@@ -433,7 +551,8 @@ class BookListWidget(QWidget):
             "length": int(table.item(row, 4).text()) if table.item(row, 4) else 0,
             "rating": float(table.item(row, 5).text()) if table.item(row, 5) else 0.0,
             "member": table.item(row, 6).text() if table.item(row, 6) else "",
-            "date_added": get_current_date(),
+            # The selected table has no Date Added column; keep the stored date
+            "date_added": stored["date_added"] if stored else get_current_date(),
             "read_date": "",
             "score": 0
         }
@@ -515,7 +634,9 @@ class BookListWidget(QWidget):
         table.setSortingEnabled(False)
         table.insertRow(row)
         
-        table.setItem(row, 0, QTableWidgetItem(book["title"]))
+        title_item = QTableWidgetItem(book["title"])
+        title_item.setData(Qt.ItemDataRole.UserRole, book.get("id"))
+        table.setItem(row, 0, title_item)
         table.setItem(row, 1, QTableWidgetItem(book["author"]))
         
         # ISBN
@@ -561,29 +682,61 @@ class BookListWidget(QWidget):
         table.setSortingEnabled(True)
 
     def _save_changes(self):
-        profile = (
-            self.profile_manager.get_current_profile() if self.profile_manager else None
+        stored = {book["id"]: book for book in self.repository.books()}
+        config = load_config(self.repository.profile)
+        inserts, updates = [], []
+        seen_ids = set()
+
+        # Every column is compared: a row in the unselected table has no read
+        # date, so a book moved there has its read_date cleared
+        for table in (self.unselected_table, self.selected_table):
+            for row in range(table.rowCount()):
+                book = self._extract_book_data(table, row)
+                if not any(book.values()):
+                    continue
+                book["score"] = self.calculate_book_score(book, config)
+
+                book_id = book.pop("id")
+                if book_id not in stored:
+                    inserts.append(book)
+                    continue
+
+                seen_ids.add(book_id)
+                original = stored[book_id]
+                if changed := {
+                    column: book[column]
+                    for column in BOOK_COLUMNS
+                    if (book[column] or "") != (original[column] or "")
+                }:
+                    updates.append((book_id, changed))
+
+        deletes = [book_id for book_id in stored if book_id not in seen_ids]
+        self.save_btn.setEnabled(False)
+        self.save_btn.setText("Saving...")
+        self.repository.apply_changes_async(
+            {"insert": inserts, "update": updates, "delete": deletes},
+            on_done=self._on_saved,
+            on_error=self._on_save_failed,
         )
-        books = []
-
-        # Process unselected table
-        for row in range(self.unselected_table.rowCount()):
-            book = self._extract_book_data(self.unselected_table, row)
-            if any(book.values()):
-                book["score"] = self.calculate_book_score(book)
-                books.append(book)
-
-        # Process selected table
-        for row in range(self.selected_table.rowCount()):
-            book = self._extract_book_data(self.selected_table, row)
-            if any(book.values()):
-                book["score"] = self.calculate_book_score(book)
-                books.append(book)
-
-        books = self.calculate_scores(books)
-        write_db(books, profile)
+
+    def _finish_saving(self):
+        self.save_btn.setEnabled(True)
+        self.save_btn.setText("Save")
+
+    def _on_saved(self, added):
+        # book_added has already put the new books back with their ids
+        for table in [self.unselected_table, self.selected_table]:
+            for row in reversed(range(table.rowCount())):
+                item = table.item(row, 0)
+                if not item or item.data(Qt.ItemDataRole.UserRole) is None:
+                    table.removeRow(row)
+        self._finish_saving()
         self.saved.emit()
 
+    def _on_save_failed(self, error):
+        self._finish_saving()
+        QMessageBox.critical(self, "Error", f"Failed to save changes: {error}")
+
     def _remove_selected(self):
         for table in [self.unselected_table, self.selected_table]:
             rows = sorted({item.row() for item in table.selectedItems()}, reverse=True)
@@ -598,6 +751,69 @@ class BookListWidget(QWidget):
             self.unselected_table.rowCount() - 1, date_col, date_item
         )
 
+    def _schedule_search(self):
+        self._search_timer.start()
+
+    def _refresh_search(self, *args):
+        if self.search_input.text().strip():
+            self._search_timer.start()
+
+    def _run_search(self):
+        query = self.search_input.text()
+        self._search_generation += 1
+        generation = self._search_generation
+
+        if not query.strip() or not self.repository:
+            self._apply_search_filter(None)
+            return
+
+        def found(ids):
+            # Drop results for text that has since changed
+            if generation == self._search_generation:
+                self._apply_search_filter(ids)
+
+        self.repository.runner.submit(
+            async_search_ids(query, self.repository.profile), found
+        )
+
+    def _apply_search_filter(self, ids):
+        """Hide rows not in ids; None shows every row. Unsaved rows stay visible."""
+        for table in [self.unselected_table, self.selected_table]:
+            for row in range(table.rowCount()):
+                item = table.item(row, 0)
+                book_id = item.data(Qt.ItemDataRole.UserRole) if item else None
+                table.setRowHidden(
+                    row, ids is not None and book_id is not None and book_id not in ids
+                )
+
+    def _find_book_row(self, book_id):
+        for table in [self.unselected_table, self.selected_table]:
+            for row in range(table.rowCount()):
+                item = table.item(row, 0)
+                if item and item.data(Qt.ItemDataRole.UserRole) == book_id:
+                    return table, row
+        return None, -1
+
+    def _on_reset(self):
+        self.load_books(self.repository.books())
+        if not (self._refresh_worker and self._refresh_worker.isRunning()):
+            self.refresh_status.setText("")
+        self._update_refresh_button()
+
+    def _on_book_removed(self, book):
+        table, row = self._find_book_row(book["id"])
+        if table:
+            table.removeRow(row)
+
+    def _on_book_updated(self, book, previous):
+        self._on_book_removed(book)
+        self.add_book(book)
+
+    def add_book(self, book):
+        """Add a single book to the table matching its selection state"""
+        table = self.selected_table if book.get("read_date") else self.unselected_table
+        self._add_book_to_table(table, book)
+
     def load_books(self, books):
         profile = (
             self.profile_manager.get_current_profile() if self.profile_manager else None
@@ -609,7 +825,7 @@ class BookListWidget(QWidget):
         if not books:
             return
 
-        books = self.calculate_scores(books)
+        books = self.calculate_scores(books, load_config(profile))
         selected = [b for b in books if b.get("read_date")]
         unselected = [b for b in books if not b.get("read_date")]
 
@@ -1,21 +1,33 @@
-import json
 from datetime import datetime
 
-from PyQt6.QtCore import Qt, QUrl, QDate
+from PyQt6.QtCore import Qt, QThreadPool, QTimer, QUrl, QDate
 from PyQt6.QtGui import QDesktopServices, QFont, QIcon, QPixmap, QTextCharFormat, QColor
-from PyQt6.QtWidgets import QHBoxLayout, QListWidgetItem, QPushButton, QWidget
-
+from PyQt6.QtWidgets import (QHBoxLayout, QInputDialog, QListWidgetItem,
+                             QMessageBox, QPushButton, QWidget)
+
+from utils.books.ingest import parse_queries
+from utils.books.openlibrary import OpenLibraryProvider
+from utils.books.providers import ProviderChain
+from utils.books.ranking import CandidateIndex
+from utils.books.scoring import BookColumns, score_columns
 from utils.books.scraping import GoodreadsClient
-from utils.books.selection import (calculate_scores, get_selected_books,
-                                   select_top_choice)
-from utils.common.constants import DATE_FORMAT
+from utils.books.selection import (calculate_book_score, get_selected_books,
+                                   matches_constraints, select_top_candidates,
+                                   selection_constraints)
+from utils.common.constants import DATE_FORMAT, DEFAULT_PROFILE
+from utils.core.config import load_config
 from utils.core.dates import format_date, get_current_date, get_next_monday
-from utils.core.db import read_db, write_db
-from utils.core.isbn import validate_isbn
-from utils.core.paths import get_data_dir, get_state_file_path, resource_path
+from utils.core.db import split_tags
+from utils.core.misc import load_misc_settings
+from utils.core.paths import get_data_dir, resource_path
+from utils.core.repository import BookRepository
+
+from .workers import AddBookJob, CoverJob, IngestWorker
 
 
 class BookManager:
+    COVER_EVICTION_DELAY_MS = 5000
+
     def __init__(self, parent):
         self.parent = parent
         self.profile_manager = parent.profile_manager if parent else None
@@ -25,40 +37,119 @@ class BookManager:
         self.word_count_input = None
         self.member_input = None
         self.selected_list = None
+        self.next_up_list = None
         self.cover_label = None
         self.details_label = None
         self.title_label = None
         self.book_list_widget = None
-        self.goodreads_client = GoodreadsClient()
+        settings = load_misc_settings()
+        self.goodreads_client = GoodreadsClient(
+            pixmap_budget=int(settings["cover_memory_mb"] * 1024 * 1024),
+            cover_cache_bytes=int(settings["cover_cache_mb"] * 1024 * 1024),
+            cover_cache_images=int(settings["cover_cache_images"]),
+            cover_format=settings["cover_format"],
+            cover_quality=int(settings["cover_quality"]),
+            cover_pack=bool(settings["cover_pack"]),
+        )
+        self.open_library = OpenLibraryProvider()
         self.read_date_calendar = None
         self.current_book_index = 0
         self.selected_books = []
         self.nav_buttons = {}
         self.store_buttons = {}
+        self._refresh_pending = False
+        self._ingest_worker = None
+        self._jobs = {}  # add-book jobs in flight, by id
+        self._cover_jobs = {}  # cover downloads in flight, by (title, author, isbn)
+        self._job_counter = 0
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(4)
+        self.repository = BookRepository(
+            self.profile_manager.get_current_profile() if self.profile_manager else None
+        )
+        self.candidates = CandidateIndex(load_config(self.repository.profile))
+        self.candidates.rebuild(self.repository.books())
+        self.repository.book_added.connect(self._on_book_added)
+        self.repository.book_updated.connect(self._on_book_updated)
+        self.repository.book_removed.connect(self._on_book_removed)
+        self.repository.reset.connect(self._on_reset)
+        # Queued: configs are also saved from worker threads, e.g. defaults
+        # written by load_config, and the handler touches widgets
+        self.repository.config_saved.connect(
+            self._on_config_saved, Qt.ConnectionType.QueuedConnection
+        )
+        # Trim the cover cache once the window is up rather than while it is built
+        QTimer.singleShot(self.COVER_EVICTION_DELAY_MS, self.goodreads_client.cover_evictor.start)
         self.load_initial_data()
         
     def load_initial_data(self):
         if self.profile_manager:
-            profile = self.profile_manager.get_current_profile()
-            books = read_db(profile)
-            self.selected_books = [b for b in books if b.get("read_date")]
-            self.selected_books.sort(key=lambda x: x.get("read_date"), reverse=False)
+            self.selected_books = self.repository.selected_books()
             self.current_book_index = len(self.selected_books) - 1 if self.selected_books else 0
 
+    def _on_config_saved(self, profile, config):
+        """Rescore the library when the current profile's config is saved."""
+        if profile != (self.repository.profile or DEFAULT_PROFILE):
+            return
+        self.candidates.set_config(config)
+        self.update_next_up()
+        books = self.repository.books()
+        scores = score_columns(BookColumns(books), config)
+        if updates := [
+            (book["id"], {"score": score})
+            for book, score in zip(books, scores)
+            if score != book["score"]
+        ]:
+            self.repository.apply_changes_async({"update": updates})
+
+    def _on_book_added(self, book):
+        self.candidates.add(book)
+        self.update_next_up()
+        self._on_book_changed(book)
+
+    def _on_book_updated(self, book, previous):
+        self.candidates.update(book)
+        self.update_next_up()
+        self._on_book_changed(book, previous)
+
+    def _on_book_removed(self, book):
+        self.candidates.remove(book)
+        self.update_next_up()
+        self._on_book_changed(book)
+
+    def _on_reset(self):
+        self.candidates.rebuild(
+            self.repository.books(), load_config(self.repository.profile)
+        )
+        self.update_next_up()
+        self._schedule_refresh()
+
+    def _on_book_changed(self, book, previous=None):
+        # Only selected books are shown on the home tab
+        if book.get("read_date") or (previous and previous.get("read_date")):
+            self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        # Coalesce the signals from one batch into a single refresh
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            QTimer.singleShot(0, self._refresh_selected_views)
+
+    def _refresh_selected_views(self):
+        self._refresh_pending = False
+        self.update_selected_list()
+        self.load_selected_books()
+        self.update_current_selection()
+        self.update_calendar_highlighting()
+
     def reload_data(self):
         profile = self.profile_manager.get_current_profile()
 
         if self.selected_list:
             self.selected_list.clear()
 
-        if self.book_list_widget:
-            books = read_db(profile)
-            self.book_list_widget.load_books(books)
-
-        self.update_selected_list()
-        self.load_selected_books()
-        self.update_current_selection()
-        self.update_calendar_highlighting()  # Update calendar when data is reloaded
+        # Reloading emits reset, which refreshes the book list and selection views
+        self.repository.set_profile(profile)
 
         if self.book_input:
             self.book_input.clear()
@@ -72,11 +163,8 @@ class BookManager:
             self.member_input.clear()
 
     def load_selected_books(self):
-        profile = self.profile_manager.get_current_profile()
-        books = read_db(profile)
-        self.selected_books = [b for b in books if b.get("read_date")]
-        # Sort in ascending order (oldest to newest)
-        self.selected_books.sort(key=lambda x: x.get("read_date"), reverse=False)
+        # Ascending order (oldest to newest)
+        self.selected_books = self.repository.selected_books()
         # Initialize to the last (most recent) book
         self.current_book_index = (
             len(self.selected_books) - 1 if self.selected_books else 0
@@ -132,11 +220,8 @@ class BookManager:
     def update_selected_list(self):
         if self.selected_list:
             self.selected_list.clear()
-            profile = self.profile_manager.get_current_profile()
-            books = read_db(profile)
-            selected_books = [b for b in books if b.get("read_date")]
             # Keep the display list in descending order (newest to oldest)
-            selected_books.sort(key=lambda x: x.get("read_date"), reverse=True)
+            selected_books = self.repository.selected_books()[::-1]
 
             for book in selected_books[:20]:
                 text = f"{book['title']}, {book['author']} ({book['member']})"
@@ -174,19 +259,41 @@ class BookManager:
 
     def _update_cover(self, book):
         if self.cover_label:
+            # Ask for device pixels, so 2x displays get the hi-dpi rendition
+            ratio = self.cover_label.devicePixelRatioF()
             if pixmap := self.goodreads_client.get_cover(
                 book["title"], 
                 book["author"],  # Add the author parameter
-                book.get("isbn")  # ISBN becomes the third parameter
+                book.get("isbn"),  # ISBN becomes the third parameter
+                size=(
+                    round(self.cover_label.width() * ratio),
+                    round(self.cover_label.height() * ratio),
+                ),
+                download=False,
             ):
-                pixmap = pixmap.scaled(
-                    self.cover_label.width(),
-                    self.cover_label.height(),
-                    Qt.AspectRatioMode.IgnoreAspectRatio,
-                )
+                pixmap.setDevicePixelRatio(ratio)
                 self.cover_label.setPixmap(pixmap)
             else:
                 self._set_placeholder_cover()
+                self._fetch_cover(book)
+
+    def _fetch_cover(self, book):
+        """Download a cover that is not cached yet on the thread pool, then show it."""
+        job = CoverJob(book["title"], book["author"], book.get("isbn") or None, self.goodreads_client)
+        if job.key in self._cover_jobs:
+            return
+        job.signals.finished.connect(self._on_cover_fetched)
+        self._cover_jobs[job.key] = job
+        self.thread_pool.start(job)
+
+    def _on_cover_fetched(self, key, has_cover):
+        self._cover_jobs.pop(key, None)
+        if not has_cover or not 0 <= self.current_book_index < len(self.selected_books):
+            return
+        # Only if the book is still the one shown
+        book = self.selected_books[self.current_book_index]
+        if (book["title"], book["author"], book.get("isbn") or None) == key:
+            self._update_cover(book)
 
     def _set_placeholder_cover(self):
         try:
@@ -207,11 +314,7 @@ class BookManager:
 
     def _get_store_urls(self, book):
         # Load store settings
-        try:
-            with open(get_state_file_path("misc_settings.json"), "r") as f:
-                settings = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            settings = {"amazon_address": ".com", "kobo_region": "us/en"}
+        settings = load_misc_settings()
 
         # Goodreads URL (using existing client logic)
         goodreads_url = self.goodreads_client._get_book_page_url(
@@ -284,112 +387,152 @@ class BookManager:
             raise ValueError(f"Invalid word count format: {word_count_str}") from e
 
     def add_book(self):
-        profile = self.profile_manager.get_current_profile()
-        try:
-            query = self.book_input.text().strip()
-            word_count_str = self.word_count_input.text().strip()
-            member = self.member_input.text().strip()
-            tags = [tag.strip() for tag in self.tags_input.text().split(",") if tag.strip()]
-
-            if not query:
-                self.parent.statusBar().setStyleSheet("color: red;")
-                self.parent.statusBar().showMessage(
-                    "Title/ISBN is required!", 6000
-                )
-                return
+        """Queue the book in the form for lookup and saving in the background."""
+        query = self.book_input.text().strip()
+        word_count_str = self.word_count_input.text().strip()
 
-            # Check if query is ISBN
-            isbn = validate_isbn(query)
-            is_isbn_query = bool(isbn)
+        if not query:
+            self._show_status("Title/ISBN is required!", error=True)
+            return
+
+        try:
+            word_count = self.parse_word_count(word_count_str) if word_count_str else None
+        except ValueError as e:
+            self._show_status(str(e), error=True)
+            return
 
-            metadata = self.goodreads_client.get_book_info(
-                query, isbn if is_isbn_query else None
+        self._job_counter += 1
+        job = AddBookJob(
+            self._job_counter,
+            {
+                "query": query,
+                "author": self.author_input.text().strip(),
+                "tags": ", ".join(split_tags(self.tags_input.text())),
+                "member": self.member_input.text().strip(),
+                "word_count": word_count,
+            },
+            self.goodreads_client,
+            profile=self.repository.profile,
+            config=load_config(self.repository.profile),
+            providers=self.metadata_providers(),
+        )
+        job.signals.metadata_ready.connect(self._on_book_metadata)
+        job.signals.cover_ready.connect(self._on_book_cover)
+        job.signals.persisted.connect(
+            lambda job_id, book, profile=job.profile: self._on_book_persisted(
+                job_id, book, profile
             )
-            
-            if metadata:
-                pixmap = self.goodreads_client.get_cover(
-                    metadata["title"],
-                    metadata["author"],
-                    isbn if is_isbn_query else metadata.get("isbn")
-                )
-                if pixmap:  # Ensure a cover was fetched
-                    pixmap = pixmap.scaled(400, 600, Qt.AspectRatioMode.IgnoreAspectRatio)
+        )
+        job.signals.failed.connect(self._on_book_failed)
+        self._jobs[job.job_id] = job
+        self.thread_pool.start(job)
+
+        # The form is free for the next book while this one is fetched
+        self.book_input.clear()
+        self.author_input.clear()
+        self.tags_input.clear()
+        self.word_count_input.clear()
+        self.member_input.clear()
+        self.book_input.setFocus()
+        self._show_status(f"Looking up {query}...{self._queued_suffix()}", timeout=0)
+
+    def _queued_suffix(self):
+        return f" ({len(self._jobs)} books in progress)" if len(self._jobs) > 1 else ""
+
+    def _on_book_metadata(self, job_id, book):
+        self._show_status(
+            f"Found {book['title']}, fetching cover...{self._queued_suffix()}", timeout=0
+        )
 
-                
-                # Use manual word count if provided, otherwise use estimated
-                try:
-                    word_count = self.parse_word_count(word_count_str) if word_count_str else metadata["length"]
-                except ValueError as e:
-                    self.parent.statusBar().setStyleSheet("color: red;")
-                    self.parent.statusBar().showMessage(str(e), 6000)
-                    return
-
-                book_data = {
-                    "title": metadata["title"],
-                    "author": metadata["author"],
-                    "isbn": isbn if is_isbn_query else metadata.get("isbn", ""),
-                    "tags": ", ".join(tags),
-                    "length": word_count,
-                    "rating": float(metadata["rating"]),
-                    "member": member,
-                    "score": 0,
-                    "date_added": get_current_date(),
-                    "read_date": "",
-                }
-            else:
-                if not word_count_str:
-                    self.parent.statusBar().setStyleSheet("color: red;")
-                    self.parent.statusBar().showMessage(
-                        "Word count is required when book metadata cannot be found!", 6000
-                    )
-                    return
+    def _on_book_cover(self, job_id, has_cover):
+        self._show_status(f"Saving book...{self._queued_suffix()}", timeout=0)
+
+    def _on_book_persisted(self, job_id, book, profile):
+        self._jobs.pop(job_id, None)
+        # A book saved to a profile we have since switched away from stays on disk only
+        if profile == self.repository.profile:
+            self.repository.merge_changes({"insert": [book]})
+        self._show_status(f"Added {book['title']}!{self._queued_suffix()}")
+
+    def _on_book_failed(self, job_id, message):
+        self._jobs.pop(job_id, None)
+        self._show_status(message, error=True)
+
+    def metadata_providers(self):
+        """The metadata providers in the order set in the settings."""
+        chain = ProviderChain.from_order(
+            load_misc_settings()["metadata_providers"],
+            {"goodreads": self.goodreads_client, "openlibrary": self.open_library},
+        )
+        # Never end up with nothing to ask
+        return chain if chain.providers else ProviderChain([self.goodreads_client])
 
-                try:
-                    word_count = self.parse_word_count(word_count_str)
-                except ValueError as e:
-                    self.parent.statusBar().setStyleSheet("color: red;")
-                    self.parent.statusBar().showMessage(str(e), 6000)
-                    return
-
-                book_data = {
-                    "title": "Unknown" if is_isbn_query else query,
-                    "author": self.author_input.text().strip() or "Unknown",
-                    "isbn": isbn if is_isbn_query else "",
-                    "tags": ", ".join(tags),
-                    "length": word_count,
-                    "rating": 0.0,
-                    "member": member,
-                    "score": 0,
-                    "date_added": get_current_date(),
-                    "read_date": "",
-                }
-
-                # Try to cache cover even for manually added books
-                self.goodreads_client.get_cover(
-                    book_data["title"],
-                    book_data["author"],
-                    book_data["isbn"] if book_data["isbn"] else None
-                )
+    def import_books(self):
+        """Add a pasted list of ISBNs or titles, one per line, in the background."""
+        if self._ingest_worker and self._ingest_worker.isRunning():
+            self._show_status("An import is already running")
+            return
 
-            books = read_db(profile)
-            books.append(book_data)
-            books_with_scores = calculate_scores(books)
+        text, ok = QInputDialog.getMultiLineText(
+            self.parent, "Import Books", "Paste ISBNs or titles, one per line:"
+        )
+        if not ok or not (queries := parse_queries(text)):
+            return
 
-            self.write_books_to_db(books_with_scores, profile)
-            self.book_input.clear()
-            self.author_input.clear()
-            self.tags_input.clear()
-            self.word_count_input.clear()
-            self.member_input.clear()
-            self.book_input.setFocus()
+        # Every imported book gets the member and tags currently entered
+        worker = IngestWorker(
+            queries,
+            member=self.member_input.text().strip() if self.member_input else "",
+            tags=", ".join(split_tags(self.tags_input.text())) if self.tags_input else "",
+            profile=self.repository.profile,
+            client=self.goodreads_client,
+            providers=self.metadata_providers(),
+        )
+        worker.progress.connect(self._on_import_progress)
+        worker.batch_written.connect(
+            lambda books, profile=worker.profile: self._on_import_batch(books, profile)
+        )
+        worker.completed.connect(self._on_import_finished)
+        self._ingest_worker = worker
+        self._show_status(f"Importing {len(queries)} books...", timeout=0)
+        worker.start()
+
+    def _on_import_progress(self, done, total, query, error):
+        message = f"Importing {done}/{total}: {query}"
+        if error:
+            message = f"{message} ({error})"
+        self._show_status(message, error=bool(error), timeout=0)
+
+    def _on_import_batch(self, books, profile):
+        # Rows for a profile we have since switched away from are already on disk
+        if profile == self.repository.profile:
+            self.repository.merge_changes({"insert": books})
+
+    def _on_import_finished(self, summary):
+        failed = summary["failed"]
+        self._show_status(
+            f"Imported {summary['added']} books in {summary['elapsed']:.1f}s"
+            f" ({summary['throughput']:.1f} requests/s)"
+            + (f", {len(failed)} failed" if failed else ""),
+            error=bool(failed) and not summary["added"],
+        )
+        if failed:
+            details = "\n".join(f"{query}: {error}" for query, error in failed[:20])
+            if len(failed) > 20:
+                details += f"\n...and {len(failed) - 20} more"
+            QMessageBox.warning(self.parent, "Import", f"Some books were not added:\n\n{details}")
+        self._ingest_worker = None
+
+    def shutdown(self):
+        """Stop background jobs before the window closes."""
+        self.thread_pool.clear()
+        self.thread_pool.waitForDone()
+        if self._ingest_worker and self._ingest_worker.isRunning():
+            self._ingest_worker.stop()
+            self._ingest_worker.wait()
+        if self.book_list_widget:
+            self.book_list_widget.stop_refresh()
 
-            self.parent.statusBar().setStyleSheet("color: green;")
-            self.parent.statusBar().showMessage("Book added successfully!", 6000)
-        except Exception as e:
-            print(f"Error adding book: {e}")
-            self.parent.statusBar().setStyleSheet("color: red;")
-            self.parent.statusBar().showMessage(f"Error adding book: {str(e)}", 6000)
-                
     def update_calendar_highlighting(self):
         if not hasattr(self, 'read_date_calendar'):
             return
@@ -399,9 +542,7 @@ class BookManager:
         self.read_date_calendar.setDateTextFormat(QDate(), format)
 
         # Get all books with read dates
-        profile = self.profile_manager.get_current_profile() if self.profile_manager else None
-        books = read_db(profile)
-        read_dates = [book['read_date'] for book in books if book.get('read_date')]
+        read_dates = [book['read_date'] for book in self.repository.selected_books()]
 
         # Create highlighting format
         highlight_format = QTextCharFormat()
@@ -416,13 +557,34 @@ class BookManager:
             except Exception as e:
                 print(f"Error highlighting date {date_str}: {e}")
 
+    def update_next_up(self, count=5):
+        if self.next_up_list is None:
+            return
+        self.next_up_list.clear()
+        # The same filters Select applies, so the list shows what it would pick
+        constraints = selection_constraints(self.candidates.config)
+        for book in self.candidates.top(
+            count, where=lambda book: matches_constraints(book, **constraints)
+        ):
+            label = f"{book['title']} ({book['score']:.2f})"
+            if book.get("member"):
+                label = f"{label} - {book['member']}"
+            self.next_up_list.addItem(label)
+
     def select_book(self):
         profile = self.profile_manager.get_current_profile()
-        books = read_db(profile)
-        books = calculate_scores(books)
-
-        if top_book := select_top_choice(books):
-            self.update_selected_book_and_refresh(top_book, books, profile)
+        config = self.candidates.config
+        # Filtered, scored and ranked in SQLite; only the winner is loaded
+        if top := select_top_candidates(
+            1, config=config, profile=profile, **selection_constraints(config)
+        ):
+            # Persist the base scores alongside the read date, not the adjusted one
+            books = [
+                {**book, "score": calculate_book_score(book, config)}
+                for book in self.repository.unselected_books()
+                if book["title"] == top[0]["title"]
+            ]
+            self.update_selected_book_and_refresh(top[0], books, profile)
         else:
             self.parent.statusBar().setStyleSheet("color: red;")
             self.parent.statusBar().showMessage("No available books!", 6000)
@@ -434,32 +596,22 @@ class BookManager:
             else get_next_monday()
         )
         top_book["read_date"] = format_date(selected_date)
+        updates = []
         for book in books:
             if book["title"] == top_book["title"]:
                 book["read_date"] = top_book["read_date"]
+                updates.append(
+                    (book["id"], {"read_date": book["read_date"], "score": book["score"]})
+                )
 
-        self.write_books_to_db(books, profile)
-        self.load_selected_books()
-        self.update_selected_list()
-        self.update_current_selection()
-        self.update_calendar_highlighting()  # Update calendar after selecting a book
-
-        self.parent.statusBar().setStyleSheet("color: green;")
-        self.parent.statusBar().showMessage("New book selected!", 6000)
-
-    def write_books_to_db(self, arg0, profile):
-        headers = [
-            "title",
-            "author",
-            "isbn",
-            "tags",
-            "length",
-            "rating",
-            "member",
-            "score",
-            "date_added",
-            "read_date",
-        ]
-        write_db(arg0, profile)
-        if self.book_list_widget:
-            self.book_list_widget.load_books(arg0)
\ No newline at end of file
+        # The repository signals refresh the selection views and calendar
+        self._show_status("Saving selection...", timeout=0)
+        self.repository.apply_changes_async(
+            {"update": updates},
+            on_done=lambda added: self._show_status("New book selected!"),
+            on_error=lambda e: self._show_status(f"Error selecting book: {e}", error=True),
+        )
+
+    def _show_status(self, message, error=False, timeout=6000):
+        self.parent.statusBar().setStyleSheet("color: red;" if error else "color: green;")
+        self.parent.statusBar().showMessage(message, timeout)
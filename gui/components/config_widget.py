@@ -1,8 +1,10 @@
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (QDoubleSpinBox, QGridLayout, QHBoxLayout, QLabel,
-                             QPushButton, QSpinBox, QVBoxLayout, QWidget)
+                             QLineEdit, QPushButton, QSpinBox, QVBoxLayout,
+                             QWidget)
 
 from utils.core.config import load_config, save_config, validate_config
+from utils.core.db import split_tags
 
 
 class ConfigWidget(QWidget):
@@ -59,6 +61,20 @@ class ConfigWidget(QWidget):
         self.third_tag_spin = QSpinBox()
         self.third_tag_spin.setRange(-100, 100)
 
+        # Selection constraint inputs; 0 words shows as no limit
+        self.min_words_spin = QSpinBox()
+        self.min_words_spin.setRange(0, 1000000)
+        self.min_words_spin.setSingleStep(1000)
+        self.min_words_spin.setSpecialValueText("No limit")
+
+        self.max_words_spin = QSpinBox()
+        self.max_words_spin.setRange(0, 1000000)
+        self.max_words_spin.setSingleStep(1000)
+        self.max_words_spin.setSpecialValueText("No limit")
+
+        self.exclude_members_input = QLineEdit()
+        self.required_tags_input = QLineEdit()
+
         current_row = 0
 
         # Rating Settings Section
@@ -133,6 +149,30 @@ class ConfigWidget(QWidget):
         settings_layout.addWidget(self.third_tag_spin, current_row, 1)
         current_row += 1
 
+        # Selection Constraints Section
+        selection_header = QLabel("Selection Constraints")
+        selection_header.setStyleSheet(
+            "font-weight: bold; font-size: 14px; padding: 10px 0;"
+        )
+        settings_layout.addWidget(selection_header, current_row, 0, 1, 2)
+        current_row += 1
+
+        settings_layout.addWidget(QLabel("  Min Words:"), current_row, 0)
+        settings_layout.addWidget(self.min_words_spin, current_row, 1)
+        current_row += 1
+
+        settings_layout.addWidget(QLabel("  Max Words:"), current_row, 0)
+        settings_layout.addWidget(self.max_words_spin, current_row, 1)
+        current_row += 1
+
+        settings_layout.addWidget(QLabel("  Exclude Members:"), current_row, 0)
+        settings_layout.addWidget(self.exclude_members_input, current_row, 1)
+        current_row += 1
+
+        settings_layout.addWidget(QLabel("  Required Tags:"), current_row, 0)
+        settings_layout.addWidget(self.required_tags_input, current_row, 1)
+        current_row += 1
+
         # Save Button
         save_btn = QPushButton("Save")
         save_btn.clicked.connect(self.save_values)
@@ -182,6 +222,15 @@ class ConfigWidget(QWidget):
 
 - Tag 1, 2, and 3 adds or subtracts points based on recent book tags
   (1 being the most recent, 2 the second most, 3 the third most)
+
+
+
+
+- Min and Max Words limit Select to books within that word count
+  (books with an unknown word count are skipped while a limit is set)
+
+- Exclude Members and Required Tags take comma-separated lists
+  (skip those members' books / only pick books carrying every tag)
         """
         )
         guide_text.setWordWrap(True)
@@ -209,6 +258,10 @@ class ConfigWidget(QWidget):
         self.last_tag_spin.setValue(0)
         self.second_tag_spin.setValue(0)
         self.third_tag_spin.setValue(0)
+        self.min_words_spin.setValue(0)
+        self.max_words_spin.setValue(0)
+        self.exclude_members_input.clear()
+        self.required_tags_input.clear()
 
         # Set new values
         self.baseline_spin.setValue(config["rating"]["baseline"])
@@ -221,6 +274,10 @@ class ConfigWidget(QWidget):
         self.last_tag_spin.setValue(config["tag_adjustments"]["last_selection"])
         self.second_tag_spin.setValue(config["tag_adjustments"]["second_last"])
         self.third_tag_spin.setValue(config["tag_adjustments"]["third_last"])
+        self.min_words_spin.setValue(config["selection"]["min_words"])
+        self.max_words_spin.setValue(config["selection"]["max_words"])
+        self.exclude_members_input.setText(", ".join(config["selection"]["exclude_members"]))
+        self.required_tags_input.setText(", ".join(config["selection"]["required_tags"]))
 
     def save_values(self):
         profile = (
@@ -245,9 +302,23 @@ class ConfigWidget(QWidget):
                 "second_last": self.second_tag_spin.value(),
                 "third_last": self.third_tag_spin.value(),
             },
+            "selection": {
+                "min_words": self.min_words_spin.value(),
+                "max_words": self.max_words_spin.value(),
+                "exclude_members": split_tags(self.exclude_members_input.text()),
+                "required_tags": split_tags(self.required_tags_input.text()),
+            },
         }
 
-        if validate_config(new_config):
+        if new_config["selection"]["max_words"] and (
+            new_config["selection"]["min_words"] > new_config["selection"]["max_words"]
+        ):
+            if self.parent:
+                self.parent.statusBar().setStyleSheet("color: red;")
+                self.parent.statusBar().showMessage(
+                    "Error: Minimum words must not be above maximum words!", 6000
+                )
+        elif validate_config(new_config):
             save_config(new_config, profile)
             if self.parent:
                 self.parent.statusBar().setStyleSheet("color: green;")
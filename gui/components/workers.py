@@ -0,0 +1,223 @@
+from PyQt6.QtCore import QObject, QRunnable, QThread, pyqtSignal
+
+from utils.books.ingest import BatchIngester
+from utils.books.refresh import RatingRefresher
+from utils.books.scoring import calculate_book_score
+from utils.core.dates import get_current_date
+from utils.core.db import apply_changes
+from utils.core.isbn import validate_isbn
+
+
+class IngestWorker(QThread):
+    """Runs a BatchIngester off the GUI thread and reports through signals."""
+
+    progress = pyqtSignal(int, int, str, str)  # done, total, query, error ("" on success)
+    batch_written = pyqtSignal(list)  # stored books, ids included
+    completed = pyqtSignal(dict)  # summary from BatchIngester.run
+
+    def __init__(
+        self, queries, member="", tags="", profile=None, client=None, providers=None, parent=None
+    ):
+        super().__init__(parent)
+        self.queries = queries
+        self.member = member
+        self.tags = tags
+        self.profile = profile
+        self.client = client
+        self.providers = providers
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        try:
+            ingester = BatchIngester(self.client, profile=self.profile, providers=self.providers)
+            summary = ingester.run(
+                self.queries,
+                self.member,
+                self.tags,
+                on_progress=lambda done, total, query, error: self.progress.emit(
+                    done, total, query, error or ""
+                ),
+                on_batch=self.batch_written.emit,
+                should_stop=lambda: self._stop,
+            )
+        except Exception as e:
+            print(f"Error importing books: {e}")
+            summary = {
+                "added": 0,
+                "failed": [("", str(e))],
+                "elapsed": 0,
+                "requests": 0,
+                "retries": 0,
+                "throughput": 0.0,
+            }
+        self.completed.emit(summary)
+
+
+class CoverSignals(QObject):
+    finished = pyqtSignal(object, bool)  # (title, author, isbn), whether a cover is cached
+
+
+class CoverJob(QRunnable):
+    """
+    Downloads a book's cover into the client's disk cache on a QThreadPool,
+    so showing it never waits on the web from the GUI thread.
+    """
+
+    def __init__(self, title, author, isbn, client):
+        super().__init__()
+        self.key = (title, author, isbn)
+        self.client = client
+        self.signals = CoverSignals()
+
+    def run(self):
+        try:
+            has_cover = self.client.cache_cover(*self.key)
+        except Exception as e:
+            print(f"Error fetching cover: {e}")
+            has_cover = False
+        self.signals.finished.emit(self.key, has_cover)
+
+
+class AddBookSignals(QObject):
+    metadata_ready = pyqtSignal(int, dict)  # job id, book to be stored
+    cover_ready = pyqtSignal(int, bool)  # job id, whether a cover is cached
+    persisted = pyqtSignal(int, dict)  # job id, stored book with its id
+    failed = pyqtSignal(int, str)  # job id, message
+
+
+class AddBookJob(QRunnable):
+    """
+    Looks up, caches the cover of and stores one book on a QThreadPool.
+
+    The request holds what was typed into the form: query, author, tags,
+    member and word_count (already parsed, or None). Metadata comes from
+    providers (a MetadataProvider, by default the client), covers from the
+    client. Each stage is reported through the job's signals, which are
+    delivered on the GUI thread.
+    """
+
+    def __init__(self, job_id, request, client, profile=None, config=None, providers=None):
+        super().__init__()
+        self.job_id = job_id
+        self.request = request
+        self.client = client
+        self.providers = providers or client
+        self.profile = profile
+        self.config = config
+        self.signals = AddBookSignals()
+
+    def run(self):
+        try:
+            record, book = self._build_book()
+            if book is None:
+                return
+            self.signals.metadata_ready.emit(self.job_id, dict(book))
+
+            has_cover = self.client.cache_cover(
+                book["title"], book["author"], book["isbn"] or None, record
+            )
+            self.signals.cover_ready.emit(self.job_id, has_cover)
+
+            book["score"] = calculate_book_score(book, self.config)
+            book_id = apply_changes({"insert": [book]}, self.profile)[0]
+            self.signals.persisted.emit(self.job_id, {**book, "id": book_id})
+        except Exception as e:
+            print(f"Error adding book: {e}")
+            self.signals.failed.emit(self.job_id, f"Error adding book: {e}")
+
+    def _build_book(self):
+        """Returns the fetch_book record (None if not found) and the row to store."""
+        query = self.request["query"]
+        word_count = self.request.get("word_count")
+        isbn = validate_isbn(query)
+
+        try:
+            metadata = self.providers.fetch_book(query, isbn)
+        except Exception as e:
+            # Fall through to adding the book by hand, as when it is not found
+            print(f"Error looking up {query}: {e}")
+            metadata = None
+        if metadata:
+            return metadata, {
+                "title": metadata["title"],
+                "author": metadata["author"],
+                "isbn": isbn or metadata.get("isbn") or "",
+                "tags": self.request.get("tags", ""),
+                # Use manual word count if provided, otherwise use estimated
+                "length": word_count if word_count is not None else metadata["length"],
+                "rating": float(metadata["rating"]),
+                "member": self.request.get("member", ""),
+                "score": 0,
+                "date_added": get_current_date(),
+                "read_date": "",
+            }
+
+        if word_count is None:
+            self.signals.failed.emit(
+                self.job_id, "Word count is required when book metadata cannot be found!"
+            )
+            return None, None
+
+        return None, {
+            "title": "Unknown" if isbn else query,
+            "author": self.request.get("author") or "Unknown",
+            "isbn": isbn or "",
+            "tags": self.request.get("tags", ""),
+            "length": word_count,
+            "rating": 0.0,
+            "member": self.request.get("member", ""),
+            "score": 0,
+            "date_added": get_current_date(),
+            "read_date": "",
+        }
+
+
+class RefreshWorker(QThread):
+    """
+    Runs a RatingRefresher off the GUI thread on the app's client, throttled
+    to its own request rate.
+    """
+
+    progress = pyqtSignal(int, int, str, str)  # checked, total, title, error ("" on success)
+    batch_written = pyqtSignal(list)  # (id, fields) updates
+    completed = pyqtSignal(dict)  # summary from RatingRefresher.run
+
+    def __init__(self, profile=None, requests_per_minute=30, client=None, parent=None):
+        super().__init__(parent)
+        self.profile = profile
+        self.requests_per_minute = requests_per_minute
+        self.client = client
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        try:
+            refresher = RatingRefresher(self.client, profile=self.profile)
+            # Only this thread is slowed down, so books added interactively
+            # at the same time still go at the client's own rate
+            with refresher.client.throttled(self.requests_per_minute / 60):
+                summary = refresher.run(
+                    on_progress=lambda checked, total, title, error: self.progress.emit(
+                        checked, total, title, error or ""
+                    ),
+                    on_batch=self.batch_written.emit,
+                    should_stop=lambda: self._stop,
+                )
+        except Exception as e:
+            print(f"Error refreshing ratings: {e}")
+            summary = {
+                "checked": 0,
+                "updated": 0,
+                "total": 0,
+                "failed": [("", str(e))],
+                "elapsed": 0,
+                "finished": False,
+                "requests": 0,
+                "retries": 0,
+            }
+        self.completed.emit(summary)
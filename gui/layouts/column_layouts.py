@@ -5,7 +5,6 @@ from PyQt6.QtWidgets import (QCalendarWidget, QHBoxLayout, QLabel, QLineEdit,
 
 from utils.core.dates import get_next_monday
 from utils.core.paths import resource_path
-from utils.core.db import read_db
 
 
 def create_left_column(book_manager):
@@ -42,12 +41,22 @@ def create_left_column(book_manager):
     add_button = QPushButton("Add")
     add_button.clicked.connect(book_manager.add_book)
 
+    import_button = QPushButton("Import List")
+    import_button.clicked.connect(book_manager.import_books)
+
     select_button = QPushButton("Select")
     select_button.clicked.connect(book_manager.select_book)
 
     book_manager.selected_list = QListWidget()
     book_manager.update_selected_list()
 
+    # Live ranking of the next candidates
+    next_up_label = QLabel("Next Up")
+    book_manager.next_up_list = QListWidget()
+    book_manager.next_up_list.setFixedHeight(110)
+    book_manager.next_up_list.setSelectionMode(QListWidget.SelectionMode.NoSelection)
+    book_manager.update_next_up()
+
     # Calendar settings
     read_date_label = QLabel("Next Book")
     weekend_format = QTextCharFormat()
@@ -74,9 +83,12 @@ def create_left_column(book_manager):
     layout.addWidget(book_manager.word_count_input)
     layout.addWidget(book_manager.member_input)
     layout.addWidget(add_button)
+    layout.addWidget(import_button)
     layout.addWidget(read_date_label)
     layout.addWidget(book_manager.read_date_calendar)
     layout.addWidget(select_button)
+    layout.addWidget(next_up_label)
+    layout.addWidget(book_manager.next_up_list)
 
     return left_column
 
@@ -1,7 +1,5 @@
 from PyQt6.QtWidgets import QTabWidget, QVBoxLayout, QWidget
 
-from utils.core.db import read_db
-
 from ..components.book_list import BookListWidget
 from ..components.config_widget import ConfigWidget
 from .selection_layout import create_selection_layout
@@ -14,10 +12,13 @@ def create_main_layout(book_manager, window, font_family):
     tabs = QTabWidget()
     tabs.addTab(create_selection_layout(book_manager), "Home")
 
-    book_list = BookListWidget(profile_manager=window.profile_manager)
-    # Connect the saved signal to book_manager's reload method
-    book_list.saved.connect(book_manager.reload_data)
-    book_list.load_books(read_db(window.profile_manager.get_current_profile()))
+    # The list follows the shared repository, so saving needs no reload
+    book_list = BookListWidget(
+        profile_manager=window.profile_manager,
+        repository=book_manager.repository,
+        client=book_manager.goodreads_client,
+    )
+    book_list.load_books(book_manager.repository.books())
     tabs.addTab(book_list, "Database")
 
     window.config_widget = ConfigWidget(window)
@@ -121,3 +121,7 @@ class BookClubWindow(QMainWindow):
         self.book_manager.reload_data()
         if self.config_widget:
             self.config_widget.reload_profile()
+
+    def closeEvent(self, event):
+        self.book_manager.shutdown()
+        super().closeEvent(event)
@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Keep the app's data out of the real home directory and run Qt headless;
+# both must be set before anything under utils or gui is imported
+os.environ["HOME"] = os.environ["APPDATA"] = tempfile.mkdtemp(prefix="fabularasa-tests-")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    return QApplication.instance() or QApplication([])
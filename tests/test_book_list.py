@@ -0,0 +1,59 @@
+import time
+
+from gui.components.book_list import BookListWidget
+from utils.core.db import apply_changes, read_db
+from utils.core.repository import BookRepository
+
+
+def make_widget(profile, **fields):
+    book = {
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "isbn": "",
+        "tags": "",
+        "length": 180000,
+        "rating": 4.2,
+        "member": "Ana",
+        "score": 0,
+        "date_added": "2024-01-01",
+        "read_date": "",
+    }
+    book.update(fields)
+    apply_changes({"insert": [book]}, profile)
+    repository = BookRepository(profile)
+    widget = BookListWidget(repository=repository)
+    widget.load_books(repository.books())
+    return widget
+
+
+def save(qapp, widget, timeout=5.0):
+    widget._save_changes()
+    deadline = time.monotonic() + timeout
+    while not widget.save_btn.isEnabled():
+        assert time.monotonic() < deadline, "save did not finish"
+        qapp.processEvents()
+        time.sleep(0.01)
+
+
+def test_deselect_then_save_clears_read_date(qapp):
+    widget = make_widget("deselect", read_date="2024-02-01")
+    assert widget.selected_table.rowCount() == 1
+
+    widget._deselect_book(0)
+    save(qapp, widget)
+
+    [book] = read_db("deselect")
+    assert book["read_date"] == ""
+    assert book["date_added"] == "2024-01-01"
+
+
+def test_saving_selected_book_keeps_date_added(qapp):
+    widget = make_widget("keep-added", read_date="2024-02-01")
+    widget.selected_table.item(0, 6).setText("Ben")
+
+    save(qapp, widget)
+
+    [book] = read_db("keep-added")
+    assert book["member"] == "Ben"
+    assert book["read_date"] == "2024-02-01"
+    assert book["date_added"] == "2024-01-01"
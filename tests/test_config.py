@@ -0,0 +1,30 @@
+import copy
+import json
+import os
+
+from utils.core.config import DEFAULT_CONFIG, get_config_path, load_config, validate_config
+
+
+def test_corrupt_config_is_moved_aside():
+    profile = "corrupt-config"
+    path = get_config_path(profile)
+    load_config(profile)
+    with open(path, "w") as f:
+        f.write('{"rating": {"baseline": 2.0,')
+
+    assert load_config(profile) == DEFAULT_CONFIG
+
+    with open(f"{path}.bad") as f:
+        assert f.read() == '{"rating": {"baseline": 2.0,'
+    with open(path) as f:
+        assert json.load(f) == DEFAULT_CONFIG
+    os.remove(f"{path}.bad")
+
+
+def test_min_words_above_max_words_is_invalid():
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["selection"].update(min_words=90000, max_words=50000)
+    assert not validate_config(config)
+
+    config["selection"]["max_words"] = 0
+    assert validate_config(config)
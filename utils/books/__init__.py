@@ -1,3 +1,5 @@
 from .scoring import *
 from .selection import *
+from .providers import *
 from .scraping import *
+from .ranking import *
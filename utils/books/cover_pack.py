@@ -0,0 +1,67 @@
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class CoverPack:
+    """
+    Append-only file of cover images, read through mmap.
+
+    Images are appended one after another and never rewritten in place;
+    whoever appends keeps the offset and length, CoverStore in its index.
+    Reads return memoryview slices of the mapping, so an image goes from
+    the page cache to the decoder without being copied. Deleted images
+    leave holes that only rewriting the live ones into a new pack reclaims.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.touch(exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "ab")
+        self._map: Optional[mmap.mmap] = None
+
+    def append(self, data) -> int:
+        """Writes data at the end of the pack, returning its offset."""
+        with self._lock:
+            offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(data)
+            self._file.flush()
+            return offset
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """
+        The bytes at offset, as a view of the mapping.
+
+        The mapping is redone when the pack has grown past it. Hold on to
+        the view only as long as needed: the pack cannot be closed while
+        views of it are alive.
+        """
+        with self._lock:
+            if self._map is None or offset + length > len(self._map):
+                if offset + length > self.size():
+                    raise ValueError(f"{self.path.name} has nothing at {offset}+{length}")
+                # The old mapping lives on as long as views of it do
+                with open(self.path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return memoryview(self._map)[offset : offset + length]
+
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    def close(self) -> bool:
+        """
+        Closes the mapping and the file. While views still hold the mapping
+        open, returns False and leaves both open, so the pack stays usable.
+        """
+        with self._lock:
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    return False
+                self._map = None
+            self._file.close()
+            return True
@@ -0,0 +1,708 @@
+"""
+Content-addressed cover cache, as loose files or a single pack file.
+
+Moving an existing cache into a pack, or back out of it, and compacting
+the pack can be done by hand with the app closed:
+
+    python -m utils.books.cover_store pack|unpack|compact|stats
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from utils.core.isbn import validate_isbn
+from utils.core.paths import get_base_dir
+
+from .cover_pack import CoverPack
+from .renditions import pick_rendition
+
+
+def cover_keys(title: str, author: str, isbn: Optional[str] = None) -> List[str]:
+    """
+    The index keys a book's cover is found under, most specific first.
+
+    The ISBN key survives the book being renamed; the title/author key
+    covers books without one. Both ignore case, punctuation and spacing.
+    """
+    keys = []
+    if isbn := validate_isbn(isbn or ""):
+        keys.append(f"isbn:{isbn}")
+
+    def normalize(text):
+        return " ".join(re.sub(r"[^\w\s]", " ", (text or "").lower()).split())
+
+    keys.append(f"title:{normalize(title)}|{normalize(author)}")
+    return keys
+
+
+class CoverStore:
+    """
+    Content-addressed store for cover images.
+
+    Each image is saved once, under the SHA-256 of its bytes, in a
+    subdirectory named after the hash's first two characters. A SQLite
+    index maps ISBN and title/author keys, one per rendition, to the hash
+    and records each image's size in bytes, dimensions, file extension and
+    last access.
+    Books that share a cover share the file, lookups are a single indexed
+    query and the cache's totals come from the index rather than the
+    directory.
+
+    With pack=True new images are appended to a single CoverPack instead,
+    at the offset the index records, which spares slow and synced disks
+    thousands of small files. Loose and packed images can be mixed;
+    to_pack and to_files move them from one to the other, and compact
+    rewrites the pack once evictions have left it mostly holes. Each
+    rewrite goes to a new pack file, named covers.<n>.pack, so the index
+    never points into a half-written one.
+    """
+
+    VERSION = 3
+
+    def __init__(self, root: Path, pack: bool = False):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.pack = pack
+        self._pack: Optional[CoverPack] = None
+        # Packs switched away from while views of them were still alive
+        self._retired: List[CoverPack] = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                hash TEXT PRIMARY KEY,
+                bytes INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                ext TEXT NOT NULL DEFAULT 'jpg',
+                pack_offset INTEGER,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_images_accessed_at ON images(accessed_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            ) WITHOUT ROWID;
+            """
+        )
+        self._migrate()
+        with self._lock:
+            self._remove_stale_packs()
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.VERSION:
+            return
+        with self._conn:
+            if version < 1:
+                self._migrate_renditions()
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(images)")]
+            if "ext" not in columns:
+                # Stores before version 2 held nothing but JPEGs
+                self._conn.execute("ALTER TABLE images ADD COLUMN ext TEXT NOT NULL DEFAULT 'jpg'")
+            if "pack_offset" not in columns:
+                self._conn.execute("ALTER TABLE images ADD COLUMN pack_offset INTEGER")
+            self._conn.execute(f"PRAGMA user_version = {self.VERSION}")
+
+    def _migrate_renditions(self):
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(keys)")]
+        if columns and "rendition" not in columns:
+            # Stores from before renditions held one 400x600 image per key
+            self._conn.execute("ALTER TABLE keys RENAME TO keys_v0")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS keys (
+                key TEXT NOT NULL,
+                rendition TEXT NOT NULL,
+                hash TEXT NOT NULL REFERENCES images(hash) ON DELETE CASCADE,
+                PRIMARY KEY (key, rendition)
+            ) WITHOUT ROWID
+            """
+        )
+        if columns and "rendition" not in columns:
+            self._conn.execute(
+                "INSERT INTO keys (key, rendition, hash) SELECT key, 'detail', hash FROM keys_v0"
+            )
+            self._conn.execute("DROP TABLE keys_v0")
+        self._conn.execute("DROP INDEX IF EXISTS idx_keys_hash")
+        self._conn.execute("CREATE INDEX idx_keys_hash ON keys(hash)")
+
+    def path(self, digest: str, ext: str = "jpg") -> Path:
+        return self.root / digest[:2] / f"{digest}.{ext}"
+
+    def _open_pack(self, create: bool = False) -> Optional[CoverPack]:
+        """
+        The pack the index points into, or with create a new one if there is
+        none. Follows another CoverStore on the same root switching packs.
+        Call with the lock held.
+        """
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'pack'").fetchone()
+        name = row[0] if row else None
+        if name is None and create:
+            name = self._next_pack_name()
+            with self._conn:
+                self._conn.execute("INSERT INTO meta (name, value) VALUES ('pack', ?)", (name,))
+        if self._pack is not None and self._pack.path.name != name:
+            self._retired.append(self._pack)
+            self._pack = None
+        if self._retired:
+            # Closed once the last view is let go; until then they stay mapped
+            self._retired = [pack for pack in self._retired if not pack.close()]
+        if self._pack is None and name is not None:
+            self._pack = CoverPack(self.root / name)
+        return self._pack
+
+    def _packs(self) -> Dict[int, Path]:
+        """Pack files in the root, by number."""
+        return {
+            int(match[1]): path
+            for path in self.root.glob("covers.*.pack")
+            if (match := re.fullmatch(r"covers\.(\d+)\.pack", path.name))
+        }
+
+    def _next_pack_name(self) -> str:
+        return f"covers.{max(self._packs(), default=0) + 1}.pack"
+
+    def _remove_stale_packs(self):
+        """
+        Deletes packs older than the current one, left behind by a rewrite
+        or a clear. Newer ones may be a rewrite in progress. Call with the
+        lock held.
+        """
+        pack = self._open_pack()
+        packs = self._packs()
+        current = next(
+            (number for number, path in packs.items() if pack and path.name == pack.path.name), None
+        )
+        for number, path in packs.items():
+            if current is None or number < current:
+                try:
+                    path.unlink()
+                except OSError:
+                    # Still mapped elsewhere (Windows); the next start retries
+                    pass
+
+    def contains(self, title: str, author: str, isbn: Optional[str] = None) -> bool:
+        """Whether a cover is stored for the book, without reading it."""
+        keys = cover_keys(title, author, isbn)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT 1 FROM keys WHERE key IN ({', '.join('?' * len(keys))}) LIMIT 1", keys
+            ).fetchone() is not None
+
+    def read(
+        self,
+        title: str,
+        author: str,
+        isbn: Optional[str] = None,
+        size: Optional[Tuple[int, int]] = None,
+    ) -> Optional[Union[bytes, memoryview]]:
+        """
+        Returns the encoded data of the cover's rendition nearest to size,
+        marking the cover as used, or None if it is not stored.
+
+        Packed renditions come back as a view of the pack's mapping; decode
+        it and let it go rather than keeping it.
+        """
+        keys = cover_keys(title, author, isbn)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT key, rendition, hash, ext, pack_offset, bytes FROM keys JOIN images USING (hash)
+                WHERE key IN ({', '.join('?' * len(keys))})
+                """,
+                keys,
+            ).fetchall()
+            if not rows:
+                return None
+            # Prefer the ISBN's cover to a title match, i.e. the first key found
+            key = next(key for key in keys if any(row[0] == key for row in rows))
+            renditions = {row[1]: row[2:] for row in rows if row[0] == key}
+            self._conn.executemany(
+                "UPDATE images SET accessed_at = ? WHERE hash = ?",
+                [(time.time(), image[0]) for image in renditions.values()],
+            )
+            self._conn.commit()
+            digest, ext, offset, length = renditions[pick_rendition(size, renditions)]
+            # Read under the lock, so to_pack cannot move the file meanwhile
+            if offset is None:
+                try:
+                    return self.path(digest, ext).read_bytes()
+                except FileNotFoundError:
+                    pass
+            elif (pack := self._open_pack()) is not None:
+                try:
+                    return pack.view(offset, length)
+                except ValueError:
+                    pass
+        # Deleted behind the index's back; forget it so it is fetched again
+        self.remove(digest)
+        return None
+
+    def put(
+        self,
+        title: str,
+        author: str,
+        isbn: Optional[str],
+        renditions: Dict[str, Tuple[bytes, int, int]],
+        ext: str = "jpg",
+    ) -> Dict[str, str]:
+        """
+        Stores a book's cover renditions, replacing any it had.
+
+        Args:
+            renditions: Encoded image data, width and height by rendition
+                name, as made by make_renditions.
+            ext (str): File extension of the renditions' format.
+
+        Returns:
+            Dict[str, str]: The hash of each rendition.
+        """
+        digests = {
+            rendition: hashlib.sha256(data).hexdigest()
+            for rendition, (data, _, _) in renditions.items()
+        }
+        with self._lock:
+            stored = {
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT hash FROM images WHERE hash IN ({', '.join('?' * len(digests))})",
+                    list(digests.values()),
+                )
+            }
+        if not self.pack:
+            for rendition, (data, _, _) in renditions.items():
+                if digests[rendition] not in stored:
+                    self._write_file(self.path(digests[rendition], ext), data)
+
+        now = time.time()
+        keys = cover_keys(title, author, isbn)
+        with self._lock:
+            offsets = {}
+            if self.pack:
+                # Appended under the lock, so compact never misses an image
+                pack = self._open_pack(create=True)
+                for rendition, (data, _, _) in renditions.items():
+                    digest = digests[rendition]
+                    if digest not in stored and digest not in offsets:
+                        offsets[digest] = pack.append(data)
+            with self._conn:
+                self._conn.executemany(
+                    """
+                    INSERT INTO images
+                        (hash, bytes, width, height, ext, pack_offset, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(hash) DO UPDATE SET accessed_at = excluded.accessed_at
+                    """,
+                    [
+                        (
+                            digests[rendition],
+                            len(data),
+                            width,
+                            height,
+                            ext,
+                            offsets.get(digests[rendition]),
+                            now,
+                            now,
+                        )
+                        for rendition, (data, width, height) in renditions.items()
+                    ],
+                )
+                self._conn.executemany(
+                    "DELETE FROM keys WHERE key = ?", [(key,) for key in keys]
+                )
+                self._conn.executemany(
+                    "INSERT INTO keys (key, rendition, hash) VALUES (?, ?, ?)",
+                    [(key, rendition, digest) for key in keys for rendition, digest in digests.items()],
+                )
+        return digests
+
+    @staticmethod
+    def _write_file(path: Path, data) -> None:
+        path.parent.mkdir(exist_ok=True)
+        # Write then rename, so a reader never sees half an image
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    def remove(self, digest: str) -> None:
+        """
+        Deletes an image and every key pointing at it. A packed image
+        leaves a hole in the pack until it is compacted.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ext, pack_offset FROM images WHERE hash = ?", (digest,)
+            ).fetchone()
+            with self._conn:
+                self._conn.execute("DELETE FROM images WHERE hash = ?", (digest,))
+        if row is None or row[1] is None:
+            self.path(digest, row[0] if row else "jpg").unlink(missing_ok=True)
+
+    def evict(self, max_bytes: int, max_covers: int, limit: int = 50) -> int:
+        """
+        Deletes up to limit covers to bring the store within its limits.
+
+        Images no key points at any more go first. Then whole covers, every
+        rendition of a book at once, go least recently read first until both
+        the total size and the number of covers fit. Images another book
+        still uses are kept.
+
+        Returns:
+            int: Covers and orphaned images deleted; 0 once the store is
+            within its limits.
+        """
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT count(*), coalesce(sum(bytes), 0) FROM images"
+            ).fetchone()
+            victims = [
+                row[0]
+                for row in self._conn.execute(
+                    """
+                    SELECT hash FROM images
+                    WHERE NOT EXISTS (SELECT 1 FROM keys WHERE keys.hash = images.hash)
+                    LIMIT ?
+                    """,
+                    (limit,),
+                )
+            ]
+            evicted = len(victims)
+            # A cover has at least one image, so this is the cheap common case
+            if not victims and count <= max_covers and size <= max_bytes:
+                return 0
+
+            # A cover is the renditions a key points at; a book's ISBN and
+            # title keys point at the same ones
+            renditions: Dict[str, set] = {}
+            image_bytes: Dict[str, int] = {}
+            accessed: Dict[str, float] = {}
+            for key, digest, length, accessed_at in self._conn.execute(
+                "SELECT key, hash, bytes, accessed_at FROM keys JOIN images USING (hash)"
+            ):
+                renditions.setdefault(key, set()).add(digest)
+                image_bytes[digest] = length
+                accessed[key] = max(accessed.get(key, 0), accessed_at)
+            covers: Dict[frozenset, List[str]] = {}
+            for key, digests in renditions.items():
+                covers.setdefault(frozenset(digests), []).append(key)
+            users: Dict[str, int] = {}
+            for digests in covers:
+                for digest in digests:
+                    users[digest] = users.get(digest, 0) + 1
+
+            size -= sum(
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT bytes FROM images WHERE hash IN ({', '.join('?' * len(victims))})",
+                    victims,
+                )
+            )
+            count = len(covers)
+            keys = []
+            for digests, names in sorted(
+                covers.items(), key=lambda cover: max(accessed[key] for key in cover[1])
+            ):
+                if evicted >= limit or (count <= max_covers and size <= max_bytes):
+                    break
+                keys.extend(names)
+                evicted += 1
+                count -= 1
+                for digest in digests:
+                    users[digest] -= 1
+                    if not users[digest]:
+                        victims.append(digest)
+                        size -= image_bytes[digest]
+
+            files = self._conn.execute(
+                f"""
+                SELECT hash, ext FROM images
+                WHERE hash IN ({', '.join('?' * len(victims))}) AND pack_offset IS NULL
+                """,
+                victims,
+            ).fetchall()
+            with self._conn:
+                self._conn.executemany("DELETE FROM keys WHERE key = ?", [(key,) for key in keys])
+                self._conn.executemany(
+                    "DELETE FROM images WHERE hash = ?", [(digest,) for digest in victims]
+                )
+        # Packed images leave holes for compact to reclaim
+        for digest, ext in files:
+            self.path(digest, ext).unlink(missing_ok=True)
+        return evicted
+
+    def clear(self) -> int:
+        """Deletes every stored image and the pack, returning how many there were."""
+        with self._lock:
+            images = self._conn.execute("SELECT hash, ext, pack_offset FROM images").fetchall()
+            with self._conn:
+                self._conn.execute("DELETE FROM images")
+                self._conn.execute("DELETE FROM meta WHERE name = 'pack'")
+            self._remove_stale_packs()
+        for digest, ext, offset in images:
+            if offset is None:
+                self.path(digest, ext).unlink(missing_ok=True)
+        return len(images)
+
+    def to_pack(self, limit: Optional[int] = None) -> int:
+        """
+        Moves up to limit loose images into the pack, imports them all with
+        limit None.
+
+        Returns:
+            int: Images handled, including ones whose file had gone; 0 once
+            there are no loose images left.
+        """
+        with self._lock:
+            images = self._conn.execute(
+                "SELECT hash, ext FROM images WHERE pack_offset IS NULL LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+        for digest, ext in images:
+            path = self.path(digest, ext)
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                self.remove(digest)
+                continue
+            with self._lock:
+                offset = self._open_pack(create=True).append(data)
+                with self._conn:
+                    moved = self._conn.execute(
+                        "UPDATE images SET pack_offset = ? WHERE hash = ? AND pack_offset IS NULL",
+                        (offset, digest),
+                    ).rowcount
+                if moved:
+                    path.unlink(missing_ok=True)
+        return len(images)
+
+    def to_files(self, limit: Optional[int] = None) -> int:
+        """
+        Moves up to limit packed images out to loose files, exports them all
+        with limit None. The pack is dropped by the next compact once
+        nothing is left in it.
+
+        Returns:
+            int: Images handled; 0 once there are no packed images left.
+        """
+        with self._lock:
+            digests = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT hash FROM images WHERE pack_offset IS NOT NULL LIMIT ?",
+                    (-1 if limit is None else limit,),
+                )
+            ]
+        for digest in digests:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT ext, pack_offset, bytes FROM images WHERE hash = ?", (digest,)
+                ).fetchone()
+                if row is None or row[1] is None or (pack := self._open_pack()) is None:
+                    continue
+                self._write_file(self.path(digest, row[0]), pack.view(row[1], row[2]))
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE images SET pack_offset = NULL WHERE hash = ?", (digest,)
+                    )
+        return len(digests)
+
+    def compact(self, min_waste: float = 0.25) -> int:
+        """
+        Rewrites the pack without the holes deleted images left, once they
+        make up at least min_waste of it; drops it once it holds nothing.
+
+        Images are copied to the new pack while covers are still read and
+        saved from the old one; only the switch holds the lock. The switch
+        is called off while views of the old pack are still alive, to be
+        tried again on the next compact.
+
+        Returns:
+            int: Bytes reclaimed.
+        """
+        with self._lock:
+            if (pack := self._open_pack()) is None:
+                return 0
+            size = pack.size()
+            packed, packed_size = self._conn.execute(
+                "SELECT count(*), coalesce(sum(bytes), 0) FROM images WHERE pack_offset IS NOT NULL"
+            ).fetchone()
+            if not packed:
+                with self._conn:
+                    self._conn.execute("DELETE FROM meta WHERE name = 'pack'")
+                self._remove_stale_packs()
+                return size
+            waste = size - packed_size
+            if not waste or waste < size * min_waste:
+                return 0
+            live = self._conn.execute(
+                "SELECT hash, pack_offset, bytes FROM images"
+                " WHERE pack_offset IS NOT NULL ORDER BY pack_offset"
+            ).fetchall()
+            new_pack = CoverPack(self.root / self._next_pack_name())
+
+        try:
+            offsets = {
+                digest: new_pack.append(pack.view(offset, length)) for digest, offset, length in live
+            }
+            with self._lock:
+                if self._open_pack() is not pack:
+                    raise RuntimeError("The pack was replaced while it was being compacted")
+                # Images saved while copying went to the end of the old pack
+                for digest, offset, length in self._conn.execute(
+                    "SELECT hash, pack_offset, bytes FROM images WHERE pack_offset >= ?", (size,)
+                ).fetchall():
+                    offsets[digest] = new_pack.append(pack.view(offset, length))
+                reclaimed = pack.size() - new_pack.size()
+                if not pack.close():
+                    new_pack.close()
+                    new_pack.path.unlink(missing_ok=True)
+                    return 0
+                # Reopened by _open_pack, should switching fail from here on
+                self._pack = None
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE images SET pack_offset = ? WHERE hash = ? AND pack_offset IS NOT NULL",
+                        [(offset, digest) for digest, offset in offsets.items()],
+                    )
+                    self._conn.execute(
+                        "UPDATE meta SET value = ? WHERE name = 'pack'", (new_pack.path.name,)
+                    )
+                self._pack = new_pack
+                self._remove_stale_packs()
+        except Exception:
+            new_pack.close()
+            new_pack.path.unlink(missing_ok=True)
+            raise
+        return reclaimed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Stored images, keys pointing at them and their total size in bytes,
+        plus how many are packed, the pack's size and the holes in it.
+        """
+        with self._lock:
+            images, size, packed, packed_size = self._conn.execute(
+                """
+                SELECT count(*), coalesce(sum(bytes), 0), count(pack_offset),
+                    coalesce(sum(CASE WHEN pack_offset IS NOT NULL THEN bytes END), 0)
+                FROM images
+                """
+            ).fetchone()
+            keys = self._conn.execute("SELECT count(*) FROM keys").fetchone()[0]
+            pack_bytes = pack.size() if (pack := self._open_pack()) else 0
+        return {
+            "images": images,
+            "keys": keys,
+            "bytes": size,
+            "packed": packed,
+            "pack_bytes": pack_bytes,
+            "pack_waste": pack_bytes - packed_size,
+        }
+
+
+class CoverEvictor:
+    """
+    Keeps a CoverStore within size and cover count limits from a background thread.
+
+    Each run deletes covers a slice at a time, pausing between slices, so
+    neither startup nor the disk is held up by a large backlog. It then
+    moves images into or out of the pack, the same way, to match the
+    store's pack setting, and compacts the pack if evictions left it full
+    of holes. start is cheap to call after every save; a run already going
+    picks it up.
+    """
+
+    def __init__(
+        self,
+        store: CoverStore,
+        max_bytes: int,
+        max_covers: int,
+        slice_size: int = 50,
+        pause: float = 0.1,
+    ):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_covers = max_covers
+        self.slice_size = slice_size
+        self.pause = pause
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = False
+
+    def start(self) -> None:
+        with self._lock:
+            if self._running:
+                self._pending = True
+                return
+            self._running = True
+        threading.Thread(target=self._run, name="cover-eviction", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                while removed := self.store.evict(self.max_bytes, self.max_covers, self.slice_size):
+                    with self._lock:
+                        self.evicted += removed
+                    time.sleep(self.pause)
+                move = self.store.to_pack if self.store.pack else self.store.to_files
+                while move(self.slice_size):
+                    time.sleep(self.pause)
+                self.store.compact()
+            except Exception as e:
+                print(f"Error evicting covers: {e}")
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                self._pending = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running, evicted = self._running, self.evicted
+        return {
+            **self.store.stats(),
+            "max_bytes": self.max_bytes,
+            "max_covers": self.max_covers,
+            "evicted": evicted,
+            "running": running,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Move the cover cache into a pack or back, with the app closed."
+    )
+    parser.add_argument("command", choices=["pack", "unpack", "compact", "stats"])
+    default_root = Path(get_base_dir()) / "cache" / "covers"
+    parser.add_argument("--root", type=Path, default=default_root, help=f"default {default_root}")
+    args = parser.parse_args(argv)
+
+    store = CoverStore(args.root, pack=args.command == "pack")
+    if args.command == "pack":
+        print(f"Packed {store.to_pack()} covers")
+        store.compact(min_waste=0)
+    elif args.command == "unpack":
+        print(f"Unpacked {store.to_files()} covers")
+        store.compact()
+    elif args.command == "compact":
+        print(f"Reclaimed {store.compact(min_waste=0)} bytes")
+    for name, value in store.stats().items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.core.config import load_config
+from utils.core.dates import get_current_date
+from utils.core.db import apply_changes, get_db
+from utils.core.isbn import validate_isbn
+
+from .providers import MetadataProvider
+from .scoring import calculate_book_score
+from .scraping import GoodreadsClient
+
+
+def parse_queries(text: str) -> List[str]:
+    """
+    Splits pasted text into one query per line, dropping blanks and repeats.
+
+    ISBNs are compared in their normalized ISBN-13 form and titles
+    case-insensitively, so the same book pasted twice is fetched once.
+    """
+    queries, seen = [], set()
+    for line in text.splitlines():
+        if not (query := line.strip()):
+            continue
+        key = validate_isbn(query) or query.lower()
+        if key not in seen:
+            seen.add(key)
+            queries.append(query)
+    return queries
+
+
+class BatchIngester:
+    """
+    Adds many books at once from a list of ISBNs or titles.
+
+    Metadata and covers are fetched on a pool of worker threads. The client's
+    per-host limit caps the requests in flight to any one site. Finished books
+    are written in batches from the thread calling run, which also reports
+    progress, so callbacks never run on the pool threads.
+    """
+
+    def __init__(
+        self,
+        client: Optional[GoodreadsClient] = None,
+        max_workers: int = 8,
+        batch_size: int = 25,
+        fetch_covers: bool = True,
+        profile=None,
+        providers: Optional[MetadataProvider] = None,
+    ):
+        self.client = client or GoodreadsClient()
+        # Where metadata is looked up; covers always come through the client
+        self.providers = providers or self.client
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.fetch_covers = fetch_covers
+        self.profile = profile
+        self.config = load_config(profile)
+
+    def _existing_isbns(self) -> set:
+        with get_db(self.profile) as conn:
+            cursor = conn.execute(
+                "SELECT isbn FROM books WHERE isbn IS NOT NULL AND isbn != ''"
+            )
+            return {row["isbn"] for row in cursor}
+
+    def fetch(self, query: str, member: str = "", tags: str = "") -> Dict[str, Any]:
+        """
+        Looks up one query and returns the book row to insert.
+
+        Raises:
+            LookupError: If no metadata could be found.
+            Exception: Whatever the lookup failed with, e.g. a network error.
+        """
+        isbn = validate_isbn(query)
+        metadata = self.providers.fetch_book(query, isbn)
+        if not metadata:
+            raise LookupError("No metadata found")
+
+        isbn = isbn or metadata.get("isbn") or ""
+        if self.fetch_covers:
+            # The record carries the cover URL, so the page is not fetched again
+            self.client.cache_cover(
+                metadata["title"], metadata["author"], isbn or None, metadata
+            )
+
+        book = {
+            "title": metadata["title"],
+            "author": metadata["author"],
+            "isbn": isbn,
+            "tags": tags,
+            "length": metadata["length"],
+            "rating": float(metadata["rating"]),
+            "member": member,
+            "score": 0,
+            "date_added": get_current_date(),
+            "read_date": "",
+        }
+        book["score"] = calculate_book_score(book, self.config)
+        return book
+
+    def run(
+        self,
+        queries: List[str],
+        member: str = "",
+        tags: str = "",
+        on_progress: Optional[Callable[[int, int, str, Optional[str]], None]] = None,
+        on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fetches and stores every query, returning a summary once all are done.
+
+        Args:
+            queries (List[str]): ISBNs or titles, e.g. from parse_queries.
+            member (str): Member recorded on every added book.
+            tags (str): Comma separated tags for every added book.
+            on_progress: Called as (done, total, query, error) as each item is
+                looked up; error is None when the item succeeded. Books are
+                written in batches, so an item whose write fails is reported
+                again, with the same done count and the error.
+            on_batch: Called with the stored books, ids included, after each write.
+            should_stop: Polled between items; returning True cancels the rest.
+
+        Returns:
+            Dict[str, Any]: "added" count, "failed" list of (query, error),
+            "elapsed" seconds, and the "requests", "retries" and "throughput"
+            (requests per second) of this run.
+        """
+        # The client is shared and long-lived, so count from where it is now
+        requests_before, retries_before = self.client.request_totals()
+        started = time.perf_counter()
+        total = len(queries)
+        done = 0
+        added = 0
+        failed = []
+        pending: List[tuple] = []  # (query, book) waiting to be written
+
+        def report(query, error=None):
+            nonlocal done
+            done += 1
+            if error:
+                failed.append((query, error))
+            if on_progress:
+                on_progress(done, total, query, error)
+
+        def flush():
+            nonlocal added
+            if not pending:
+                return
+            batch = list(pending)
+            pending.clear()
+            try:
+                new_ids = apply_changes(
+                    {"insert": [book for _, book in batch]}, self.profile
+                )
+            except Exception as e:
+                for query, _ in batch:
+                    failed.append((query, f"Could not save: {e}"))
+                    if on_progress:
+                        on_progress(done, total, query, f"Could not save: {e}")
+                return
+            stored = [{**book, "id": book_id} for (_, book), book_id in zip(batch, new_ids)]
+            added += len(stored)
+            if on_batch:
+                on_batch(stored)
+
+        existing = self._existing_isbns()
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="ingest") as pool:
+            futures = {}
+            for query in queries:
+                if (isbn := validate_isbn(query)) and isbn in existing:
+                    report(query, "Already in the library")
+                    continue
+                futures[pool.submit(self.fetch, query, member, tags)] = query
+
+            remaining = set(futures)
+            while remaining:
+                if should_stop and should_stop():
+                    for future in remaining:
+                        future.cancel()
+                    break
+                finished, remaining = wait(remaining, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    query = futures[future]
+                    try:
+                        book = future.result()
+                    except Exception as e:
+                        report(query, str(e))
+                        continue
+                    # A title search can resolve to a book an earlier item already added
+                    if book["isbn"] and book["isbn"] in existing:
+                        report(query, "Already in the library")
+                        continue
+                    if book["isbn"]:
+                        existing.add(book["isbn"])
+                    pending.append((query, book))
+                    report(query)
+                    if len(pending) >= self.batch_size:
+                        flush()
+            flush()
+
+        elapsed = time.perf_counter() - started
+        requests, retries = self.client.request_totals()
+        requests -= requests_before
+        return {
+            "added": added,
+            "failed": failed,
+            "elapsed": elapsed,
+            "requests": requests,
+            "retries": retries - retries_before,
+            "throughput": requests / elapsed if elapsed else 0.0,
+        }
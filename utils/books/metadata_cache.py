@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+DAY = 24 * 60 * 60
+
+
+class MetadataCache:
+    """
+    SQLite-backed cache for scraped lookups.
+
+    Entries are JSON values stored under a kind ("url" for search results,
+    "page" for parsed book pages) and a key, each with its own expiry time.
+    Expired entries are still served, while a background thread fetches a
+    replacement, so a repeat lookup never waits on the network.
+    """
+
+    TTLS = {"url": 90 * DAY, "page": 14 * DAY}
+
+    def __init__(self, path: Path, ttls: Optional[Dict[str, float]] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttls = {**self.TTLS, **(ttls or {})}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(2, thread_name_prefix="metadata-cache")
+
+    def get(self, kind: str, key: str) -> Optional[tuple]:
+        """Returns (value, fresh) for a cached entry, or None when there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE kind = ? AND key = ?",
+                (kind, key),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1] > time.time()
+
+    def put(self, kind: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttls[kind] if ttl is None else ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (kind, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(value), expires_at),
+            )
+            self._conn.commit()
+
+    def lookup(self, kind: str, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value, calling loader only when nothing is cached.
+
+        A stale value is returned as is and reloaded in the background. None
+        results are not cached, so failed lookups are retried next time.
+        """
+        if hit := self.get(kind, key):
+            value, fresh = hit
+            if not fresh:
+                self._revalidate(kind, key, loader)
+            return value
+
+        value = loader()
+        if value is not None:
+            self.put(kind, key, value)
+        return value
+
+    def refresh(self, kind: str, key: str, loader: Callable[[], Any]) -> Any:
+        """Calls loader regardless of what is cached and stores a non-None result."""
+        value = loader()
+        if value is not None:
+            self.put(kind, key, value)
+        return value
+
+    def _revalidate(self, kind, key, loader):
+        with self._lock:
+            if (kind, key) in self._refreshing:
+                return
+            self._refreshing.add((kind, key))
+
+        def refresh():
+            try:
+                if (value := loader()) is not None:
+                    self.put(kind, key, value)
+            except Exception as e:
+                print(f"Error refreshing cached {kind} {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard((kind, key))
+
+        self._executor.submit(refresh)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
@@ -0,0 +1,285 @@
+"""
+Offline book metadata from an Open Library editions dump.
+
+The dumps (https://openlibrary.org/developers/dumps) are tab separated, one
+record per line, with the record's JSON in the last column. build_index
+reads the editions dump, plus optionally the authors dump for author names,
+into a SQLite index keyed by ISBN-13:
+
+    python -m utils.books.openlibrary ol_dump_editions_latest.txt.gz \\
+        --authors ol_dump_authors_latest.txt.gz
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from utils.core.isbn import validate_isbn
+from utils.core.paths import get_base_dir
+from utils.core.word_count import estimate_word_count
+
+from .providers import MetadataProvider
+
+COVER_URL = "https://covers.openlibrary.org/b/id/{}-L.jpg"
+BATCH_SIZE = 10000
+
+
+def default_index_path() -> Path:
+    return get_base_dir() / "openlibrary" / "index.db"
+
+
+def _open_dump(path) -> Iterator[str]:
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        yield from f
+
+
+def _records(path, marker: str) -> Iterator[Dict[str, Any]]:
+    for line in _open_dump(path):
+        # Most lines can be skipped without decoding their JSON
+        if marker not in line:
+            continue
+        try:
+            yield json.loads(line.rsplit("\t", 1)[-1])
+        except ValueError:
+            continue
+
+
+def _key(key: str) -> str:
+    # "/authors/OL23919A" -> "OL23919A"
+    return key.rsplit("/", 1)[-1]
+
+
+def _edition_rows(edition: Dict[str, Any]) -> Iterator[tuple]:
+    title = edition.get("title")
+    if not title:
+        return
+    if subtitle := edition.get("subtitle"):
+        title = f"{title}: {subtitle}"
+
+    authors = edition.get("authors") or []
+    author_key = _key(authors[0].get("key", "")) if authors and isinstance(authors[0], dict) else None
+    pages = edition.get("number_of_pages")
+    covers = [cover for cover in edition.get("covers") or [] if isinstance(cover, int) and cover > 0]
+    row = (
+        title,
+        author_key or None,
+        edition.get("by_statement") or None,
+        pages if isinstance(pages, int) and pages > 0 else None,
+        covers[0] if covers else None,
+    )
+
+    isbns = set()
+    for isbn in (edition.get("isbn_13") or []) + (edition.get("isbn_10") or []):
+        if isinstance(isbn, str) and (isbn := validate_isbn(isbn)):
+            isbns.add(isbn)
+    for isbn in isbns:
+        yield (int(isbn), *row)
+
+
+def build_index(
+    editions_path,
+    authors_path=None,
+    index_path=None,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Builds the ISBN index from the dumps, replacing any previous index.
+
+    The index is written to a temporary file and moved into place once it
+    is complete, so lookups keep working while it is rebuilt.
+
+    Args:
+        editions_path: Editions dump, optionally gzipped.
+        authors_path: Authors dump; without it, authors fall back to the
+            edition's "by" statement.
+        index_path: Where to write the index; defaults to default_index_path().
+        on_progress: Called with the number of ISBNs indexed after each batch.
+
+    Returns:
+        Dict[str, Any]: "isbns" and "authors" indexed, "elapsed" seconds and
+        the index "size" in bytes.
+    """
+    started = time.perf_counter()
+    index_path = Path(index_path or default_index_path())
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = index_path.with_suffix(".building")
+    temp_path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(temp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        # The ISBN is the rowid, so a lookup is a single b-tree search
+        conn.execute(
+            """
+            CREATE TABLE editions (
+                isbn INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                author_key TEXT,
+                by_statement TEXT,
+                pages INTEGER,
+                cover_id INTEGER
+            )
+            """
+        )
+        conn.execute(
+            "CREATE TABLE authors (key TEXT PRIMARY KEY, name TEXT NOT NULL) WITHOUT ROWID"
+        )
+
+        isbns = 0
+        batch = []
+        for edition in _records(editions_path, '"isbn_1'):
+            batch.extend(_edition_rows(edition))
+            if len(batch) >= BATCH_SIZE:
+                # Editions sharing an ISBN keep the first one seen
+                conn.executemany("INSERT OR IGNORE INTO editions VALUES (?, ?, ?, ?, ?, ?)", batch)
+                isbns += len(batch)
+                batch.clear()
+                if on_progress:
+                    on_progress(isbns)
+        conn.executemany("INSERT OR IGNORE INTO editions VALUES (?, ?, ?, ?, ?, ?)", batch)
+        isbns += len(batch)
+
+        authors = 0
+        if authors_path:
+            # Only authors of indexed editions are kept
+            wanted = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT author_key FROM editions WHERE author_key IS NOT NULL"
+                )
+            }
+            batch = []
+            for author in _records(authors_path, '"name"'):
+                key = _key(author.get("key", ""))
+                if key in wanted and isinstance(author.get("name"), str):
+                    batch.append((key, author["name"]))
+                if len(batch) >= BATCH_SIZE:
+                    conn.executemany("INSERT OR IGNORE INTO authors VALUES (?, ?)", batch)
+                    authors += len(batch)
+                    batch.clear()
+            conn.executemany("INSERT OR IGNORE INTO authors VALUES (?, ?)", batch)
+            authors += len(batch)
+
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(temp_path, index_path)
+    return {
+        "isbns": _count_isbns(index_path),
+        "authors": authors,
+        "elapsed": time.perf_counter() - started,
+        "size": index_path.stat().st_size,
+    }
+
+
+def _count_isbns(index_path) -> int:
+    conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT count(*) FROM editions").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class OpenLibraryProvider(MetadataProvider):
+    """
+    Looks books up by ISBN in a local index built by build_index.
+
+    Lookups need no network and take a few microseconds. Title queries are
+    not indexed and return None, as do all lookups while there is no index.
+    Open Library has no ratings, so records found here have a rating of 0.
+    """
+
+    name = "openlibrary"
+
+    def __init__(self, index_path=None):
+        self.index_path = Path(index_path or default_index_path())
+        self._conn = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return self.index_path.exists()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Reopen after the index has been rebuilt
+        try:
+            mtime = self.index_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if self._conn is None or mtime != self._mtime:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = sqlite3.connect(
+                f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False
+            )
+            # Map the index into memory instead of copying pages into SQLite's cache
+            self._conn.execute("PRAGMA mmap_size = 1073741824")
+            self._mtime = mtime
+        return self._conn
+
+    def fetch_book(
+        self, query: str, isbn: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        if not (isbn := validate_isbn(isbn or "") or validate_isbn(query)):
+            return None
+
+        with self._lock:
+            if not (conn := self._connection()):
+                return None
+            row = conn.execute(
+                """
+                SELECT e.title, a.name, e.by_statement, e.pages, e.cover_id
+                FROM editions e LEFT JOIN authors a ON a.key = e.author_key
+                WHERE e.isbn = ?
+                """,
+                (int(isbn),),
+            ).fetchone()
+        if not row:
+            return None
+
+        title, author, by_statement, pages, cover_id = row
+        return {
+            "url": f"https://openlibrary.org/isbn/{isbn}",
+            "title": title,
+            "author": author or by_statement or "Unknown Author",
+            "rating": 0.0,
+            "pages": pages or 0,
+            "length": estimate_word_count(pages) if pages else 0,
+            "cover_url": COVER_URL.format(cover_id) if cover_id else None,
+            "isbn": isbn,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline Open Library ISBN index.")
+    parser.add_argument("editions", type=Path, help="editions dump (.txt or .txt.gz)")
+    parser.add_argument("--authors", type=Path, help="authors dump, for author names")
+    parser.add_argument("--index", type=Path, help=f"output (default {default_index_path()})")
+    args = parser.parse_args(argv)
+
+    summary = build_index(
+        args.editions,
+        args.authors,
+        args.index,
+        on_progress=lambda count: print(f"\r{count:,} ISBNs", end="", flush=True),
+    )
+    print(
+        f"\nIndexed {summary['isbns']:,} ISBNs and {summary['authors']:,} authors "
+        f"in {summary['elapsed']:.0f}s ({summary['size'] / 1024 / 1024:.0f} MiB)"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import html
+import json
+import re
+from typing import Any, Dict, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.core.word_count import clean_page_count
+
+try:
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:  # lxml is optional; html.parser is slower but always there
+    HTML_PARSER = "html.parser"
+
+_JSON_LD = re.compile(
+    r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S
+)
+_NEXT_DATA = re.compile(r'<script[^>]*id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S)
+# JSON-LD names carry the series, as in "The Hunger Games (The Hunger Games, #1)"
+_SERIES_SUFFIX = re.compile(r"\s*\([^()]*,\s*#[\d.\-]+\)\s*$")
+
+# Only elements with these classes, and whatever is inside them, are kept by
+# the strained parse. The title and page count sit inside the wrapper divs.
+_STRAINER = SoupStrainer(
+    attrs={
+        "class": re.compile(
+            r"^(BookPageTitleSection__title|ContributorLink__name|RatingStatistics__rating"
+            r"|FeaturedDetails|BookCover__image)$"
+        )
+    }
+)
+
+
+def parse_search_page(page: str) -> Optional[str]:
+    """Returns the link of the first result on a search page, if any."""
+    soup = BeautifulSoup(page, HTML_PARSER, parse_only=SoupStrainer("a", class_="bookTitle"))
+    book_link = soup.select_one("a.bookTitle")
+    return book_link.get("href") if book_link else None
+
+
+def parse_book_page(page: str) -> Optional[Dict[str, Any]]:
+    """
+    Extracts a book's title, author, rating, page count and cover URL from a
+    Goodreads book page.
+
+    The structured data embedded in the page (JSON-LD, then Next.js page
+    data) is read first, which avoids building a DOM at all. Pages without
+    it fall back to a parse limited to the handful of elements we read, and
+    only then to parsing the whole page.
+
+    Returns:
+        Optional[Dict[str, Any]]: title, author, rating, pages and cover_url
+        (author and cover_url may be None), or None if there is no title.
+    """
+    for extract in (
+        _from_json_ld,
+        _from_next_data,
+        parse_html,
+        lambda page: parse_html(page, strained=False),
+    ):
+        try:
+            record = extract(page)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            continue
+        if record and record.get("title"):
+            return record
+    return None
+
+
+def _record(title, author, rating, pages, cover_url) -> Dict[str, Any]:
+    return {
+        "title": html.unescape(str(title)).strip(),
+        "author": html.unescape(str(author)).strip() if author else None,
+        "rating": float(rating) if rating not in (None, "") else 0.0,
+        "pages": int(pages) if pages else 0,
+        "cover_url": cover_url or None,
+    }
+
+
+def _from_json_ld(page: str) -> Optional[Dict[str, Any]]:
+    for match in _JSON_LD.finditer(page):
+        data = json.loads(match.group(1))
+        for item in data if isinstance(data, list) else [data]:
+            if item.get("@type") != "Book":
+                continue
+            authors = item.get("author") or []
+            if isinstance(authors, dict):
+                authors = [authors]
+            return _record(
+                _SERIES_SUFFIX.sub("", item.get("name") or ""),
+                authors[0].get("name") if authors else None,
+                (item.get("aggregateRating") or {}).get("ratingValue"),
+                item.get("numberOfPages"),
+                item.get("image"),
+            )
+    return None
+
+
+def _from_next_data(page: str) -> Optional[Dict[str, Any]]:
+    if not (match := _NEXT_DATA.search(page)):
+        return None
+    state = json.loads(match.group(1))["props"]["pageProps"]["apolloState"]
+
+    def resolve(value):
+        return state.get(value["__ref"], {}) if isinstance(value, dict) and "__ref" in value else value
+
+    # The page's own book is the one the root query asked for; others are recommendations
+    book = next(
+        (
+            resolve(value)
+            for key, value in state.get("ROOT_QUERY", {}).items()
+            if key.startswith("getBookByLegacyId")
+        ),
+        None,
+    ) or next(
+        (value for key, value in state.items() if key.startswith("Book:") and "details" in value),
+        None,
+    )
+    if not book:
+        return None
+
+    contributor = resolve((book.get("primaryContributorEdge") or {}).get("node"))
+    work = resolve(book.get("work")) or {}
+    return _record(
+        book.get("title"),
+        (contributor or {}).get("name"),
+        (work.get("stats") or {}).get("averageRating"),
+        (book.get("details") or {}).get("numPages"),
+        book.get("imageUrl"),
+    )
+
+
+def parse_html(page: str, strained: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Reads the book from the rendered HTML.
+
+    With strained=False the whole page is parsed with html.parser, which is
+    how pages were read before the fast paths existed; the benchmark uses it
+    as the baseline.
+    """
+    if strained:
+        soup = BeautifulSoup(page, HTML_PARSER, parse_only=_STRAINER)
+    else:
+        soup = BeautifulSoup(page, "html.parser")
+
+    title = soup.select_one("h1[data-testid='bookTitle']")
+    if not title:
+        return None
+    author = soup.select_one("span.ContributorLink__name")
+    rating = soup.select_one("div.RatingStatistics__rating")
+    pages = soup.select_one("p[data-testid='pagesFormat']")
+    cover = soup.select_one("div.BookCover__image img.ResponsiveImage")
+
+    return _record(
+        title.text,
+        author.text if author else None,
+        rating.text.strip() if rating else None,
+        clean_page_count(pages.text) if pages else 0,
+        cover.get("src") if cover else None,
+    )
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPixmap
+
+Size = Tuple[int, int]
+
+
+class PixmapCache:
+    """
+    LRU cache of decoded covers, bounded by the memory their pixels take.
+
+    Each cover is kept as decoded, under size None, and scaled to every size
+    it has been shown at, so showing it again skips the disk, the JPEG
+    decoder and the scaling. Least recently used entries are dropped once
+    the total goes over the budget. QPixmaps belong to the GUI thread, and
+    so does this cache.
+    """
+
+    def __init__(self, budget_bytes: int = 64 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Tuple[Hashable, Optional[Size]], QPixmap]" = OrderedDict()
+        self.hits = 0
+        self.scaled_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _cost(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, key: Hashable, size: Optional[Size] = None) -> Optional[QPixmap]:
+        """
+        Returns the cover at size (w, h), or as decoded when size is None.
+
+        A missing size is scaled from the decoded cover if that is cached,
+        and kept for next time.
+        """
+        if (pixmap := self._entries.get((key, size))) is not None:
+            self._entries.move_to_end((key, size))
+            self.hits += 1
+            return pixmap
+
+        if size is not None and (original := self._entries.get((key, None))) is not None:
+            self._entries.move_to_end((key, None))
+            self.scaled_hits += 1
+            return self.put(key, self.scale(original, size), size)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, pixmap: QPixmap, size: Optional[Size] = None) -> QPixmap:
+        entry = (key, size)
+        if (previous := self._entries.pop(entry, None)) is not None:
+            self.bytes -= self._cost(previous)
+        self._entries[entry] = pixmap
+        self.bytes += self._cost(pixmap)
+        while self.bytes > self.budget_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= self._cost(evicted)
+        return pixmap
+
+    def discard(self, key: Hashable) -> None:
+        """Drops a cover and all its sizes, e.g. after its file changed."""
+        for entry in [entry for entry in self._entries if entry[0] == key]:
+            self.bytes -= self._cost(self._entries.pop(entry))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    @staticmethod
+    def scale(pixmap: QPixmap, size: Size) -> QPixmap:
+        return pixmap.scaled(
+            size[0],
+            size[1],
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.scaled_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "scaled_hits": self.scaled_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.scaled_hits) / lookups if lookups else 0.0,
+        }
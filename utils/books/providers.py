@@ -0,0 +1,74 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class MetadataProvider:
+    """
+    A source of book metadata.
+
+    fetch_book returns a record with url, title, author, rating, pages,
+    length (estimated word count), cover_url and isbn, or None if the
+    provider does not know the book. A lookup that fails, e.g. on a network
+    error, raises rather than returning None.
+    """
+
+    name = ""
+
+    def available(self) -> bool:
+        """Whether the provider can answer lookups at all, e.g. has its data."""
+        return True
+
+    def fetch_book(
+        self, query: str, isbn: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class ProviderChain(MetadataProvider):
+    """
+    Asks each provider in turn and returns the first record found.
+
+    A provider that fails does not stop the others from being asked. If none
+    finds the book and any failed, the failures are raised as one LookupError,
+    since the book may exist after all.
+    """
+
+    name = "chain"
+
+    def __init__(self, providers: Iterable[MetadataProvider]):
+        self.providers = list(providers)
+
+    @classmethod
+    def from_order(
+        cls, order: Iterable[str], providers: Dict[str, MetadataProvider]
+    ) -> "ProviderChain":
+        """
+        Chains the named providers in the given order.
+
+        Unknown names and providers that are not available are skipped.
+        """
+        chain = []
+        for name in order:
+            provider = providers.get(name.strip().lower())
+            if provider and provider not in chain and provider.available():
+                chain.append(provider)
+        return cls(chain)
+
+    def names(self) -> List[str]:
+        return [provider.name for provider in self.providers]
+
+    def fetch_book(
+        self, query: str, isbn: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Returns the first provider's record, with its name as "source"."""
+        errors = []
+        for provider in self.providers:
+            try:
+                record = provider.fetch_book(query, isbn)
+            except Exception as e:
+                errors.append(f"{provider.name}: {e}")
+                continue
+            if record:
+                return {**record, "source": provider.name}
+        if errors:
+            raise LookupError("; ".join(errors))
+        return None
@@ -0,0 +1,174 @@
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.core.config import load_config
+
+from .scoring import BookColumns, adjust_columns, score_columns
+from .selection import get_member_penalties, get_tag_adjustments, title_key
+
+
+class CandidateIndex:
+    """
+    Unselected books ranked by adjusted score.
+
+    Produces the same winner as selection.select_top_choice, but keeps the
+    ranking between calls. Edits to unselected books re-rank only that book.
+    Selecting or deselecting a book re-applies the member and tag adjustments
+    only when the three most recent selections actually change. Config
+    changes rebuild the whole index through the batch scoring engine.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or load_config()
+        self._books: Dict[int, Dict[str, Any]] = {}  # every book, by id
+        self._selected: List[tuple] = []  # (read_date, id), ascending
+        self._selected_titles: Counter = Counter()
+        self._titles: Dict[str, set] = defaultdict(set)  # title key -> unselected ids
+        self._base_scores: Dict[int, float] = {}
+        self._scores: Dict[int, float] = {}  # adjusted score of each ranked id
+        self._ranked: List[tuple] = []  # (-adjusted score, id), best first
+        self._penalties: Dict[str, Any] = {}
+        self._tag_adjustments: Dict[str, Any] = {}
+
+    def rebuild(self, books, config=None):
+        """Index a full list of books from scratch."""
+        if config is not None:
+            self.config = config
+        self._books = {book["id"]: dict(book) for book in books}
+        self._selected = sorted(
+            (book["read_date"], book["id"]) for book in books if book.get("read_date")
+        )
+        self._selected_titles = Counter(
+            title_key(self._books[book_id]["title"]) for _, book_id in self._selected
+        )
+        self._titles = defaultdict(set)
+        unselected = [book for book in self._books.values() if not book.get("read_date")]
+        for book in unselected:
+            self._titles[title_key(book["title"])].add(book["id"])
+        scores = score_columns(BookColumns(unselected), self.config)
+        self._base_scores = {book["id"]: score for book, score in zip(unselected, scores)}
+        self._update_adjustments(force=True)
+
+    def set_config(self, config):
+        self.rebuild(list(self._books.values()), config)
+
+    def recent_selections(self) -> List[Dict[str, Any]]:
+        """Selected books, most recent first."""
+        return [self._books[book_id] for _, book_id in reversed(self._selected)]
+
+    def _update_adjustments(self, force=False):
+        recent = self.recent_selections()[:3]
+        penalties = get_member_penalties(recent, self.config)
+        tag_adjustments = get_tag_adjustments(recent, self.config)
+        if not force and (penalties, tag_adjustments) == (
+            self._penalties,
+            self._tag_adjustments,
+        ):
+            return
+        self._penalties, self._tag_adjustments = penalties, tag_adjustments
+
+        ids = [
+            book_id
+            for book_id in self._base_scores
+            if title_key(self._books[book_id]["title"]) not in self._selected_titles
+        ]
+        books = [self._books[book_id] for book_id in ids]
+        adjusted = adjust_columns(
+            BookColumns(books),
+            [self._base_scores[book_id] for book_id in ids],
+            penalties,
+            tag_adjustments,
+        )
+        self._scores = dict(zip(ids, adjusted))
+        self._ranked = sorted((-score, book_id) for book_id, score in self._scores.items())
+
+    def _rank(self, book_id):
+        book = self._books[book_id]
+        if title_key(book["title"]) in self._selected_titles:
+            return
+        score = adjust_columns(
+            BookColumns([book]),
+            [self._base_scores[book_id]],
+            self._penalties,
+            self._tag_adjustments,
+        )[0]
+        self._scores[book_id] = score
+        insort(self._ranked, (-score, book_id))
+
+    def _unrank(self, book_id):
+        if (score := self._scores.pop(book_id, None)) is not None:
+            del self._ranked[bisect_left(self._ranked, (-score, book_id))]
+
+    def _insert(self, book):
+        book = dict(book)
+        self._books[book["id"]] = book
+        if book.get("read_date"):
+            insort(self._selected, (book["read_date"], book["id"]))
+            key = title_key(book["title"])
+            self._selected_titles[key] += 1
+            if self._selected_titles[key] == 1:
+                for book_id in self._titles.get(key, ()):
+                    self._unrank(book_id)
+            return True
+
+        self._titles[title_key(book["title"])].add(book["id"])
+        self._base_scores[book["id"]] = score_columns(BookColumns([book]), self.config)[0]
+        self._rank(book["id"])
+        return False
+
+    def _delete(self, book_id):
+        book = self._books.pop(book_id)
+        if book.get("read_date"):
+            del self._selected[bisect_left(self._selected, (book["read_date"], book_id))]
+            key = title_key(book["title"])
+            self._selected_titles[key] -= 1
+            if not self._selected_titles[key]:
+                del self._selected_titles[key]
+                for other_id in self._titles.get(key, ()):
+                    self._rank(other_id)
+            return True
+
+        self._unrank(book_id)
+        self._titles[title_key(book["title"])].discard(book_id)
+        del self._base_scores[book_id]
+        return False
+
+    def add(self, book):
+        if self._insert(book):
+            self._update_adjustments()
+
+    def remove(self, book):
+        if book["id"] in self._books and self._delete(book["id"]):
+            self._update_adjustments()
+
+    def update(self, book):
+        # The index keeps its own copy of every book, so the old entry is found by id
+        selection_changed = False
+        if book["id"] in self._books:
+            selection_changed = self._delete(book["id"])
+        selection_changed = self._insert(book) or selection_changed
+        if selection_changed:
+            self._update_adjustments()
+
+    def top(self, k=1, where: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """
+        The k best candidates, best first; with where, only the books it accepts.
+
+        Each is a copy of the book whose "score" is the adjusted score, the
+        same shape selection.adjust_scores returns.
+        """
+        if where is None:
+            ranked = self._ranked[:k]
+        else:
+            ranked = islice(
+                (entry for entry in self._ranked if where(self._books[entry[1]])), k
+            )
+        return [
+            {**self._books[book_id], "score": -negative_score}
+            for negative_score, book_id in ranked
+        ]
+
+    def __len__(self):
+        return len(self._ranked)
@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Any, Dict
+
+
+class TokenBucket:
+    """
+    Token bucket allowing rate requests per second on average, in bursts of
+    up to capacity. Thread-safe; acquire blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        # Stats, read through snapshot()
+        self.requests = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.retries = 0
+        self.failures = 0
+        self._started = None
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take a token, sleeping as needed; returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._started is None:
+                    self._started = now
+                self._refill(now)
+                delay = max(self._paused_until - now, 0)
+                if not delay and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    if waited:
+                        self.waits += 1
+                        self.wait_time += waited
+                    return waited
+                if not delay:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller, e.g. after the host answered 429."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def set_rate(self, rate: float, capacity: float = None) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            if capacity is not None:
+                self.capacity = capacity
+                self.tokens = min(self.tokens, capacity)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            elapsed = now - self._started if self._started is not None else 0
+            return {
+                "rate": self.rate,
+                "tokens": round(self.tokens, 2),
+                "requests": self.requests,
+                "waits": self.waits,
+                "wait_time": round(self.wait_time, 3),
+                "retries": self.retries,
+                "failures": self.failures,
+                "throughput": self.requests / elapsed if elapsed else 0.0,
+            }
+
+
+class RateLimiter:
+    """One TokenBucket per host, created on first use with the default rate."""
+
+    def __init__(self, rate: float = 2.0, capacity: float = 5):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.capacity)
+            return self._buckets[host]
+
+    def set_rate(self, rate: float, capacity: float = None) -> None:
+        """Change the rate of every host, current and future."""
+        with self._lock:
+            self.rate = rate
+            if capacity is not None:
+                self.capacity = capacity
+            buckets = list(self._buckets.values())
+        for bucket in buckets:
+            bucket.set_rate(rate, capacity)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host tokens, waits, retries and effective requests per second."""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.snapshot() for host, bucket in buckets.items()}
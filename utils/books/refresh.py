@@ -0,0 +1,160 @@
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.core.config import load_config
+from utils.core.db import apply_changes, get_db, get_job_state
+from utils.core.isbn import validate_isbn
+
+from .scoring import calculate_book_score
+from .scraping import GoodreadsClient
+
+
+class RatingRefresher:
+    """
+    Re-fetches the rating and page count of every unselected book.
+
+    Books are walked in id order and changes are written every batch_size
+    books, in the same transaction as a checkpoint of how far the walk got.
+    A run that is stopped, or killed with the app, resumes after the last
+    written batch. The request rate is whatever the client is limited to;
+    GoodreadsClient.throttled slows a run down without holding up others.
+    """
+
+    JOB = "rating_refresh"
+
+    def __init__(
+        self,
+        client: Optional[GoodreadsClient] = None,
+        profile=None,
+        batch_size: int = 20,
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        self.client = client or GoodreadsClient()
+        self.profile = profile
+        self.batch_size = batch_size
+        self.config = config or load_config(profile)
+
+    def checkpoint(self) -> Optional[Dict[str, Any]]:
+        """The saved progress of an unfinished run, or None."""
+        return get_job_state(self.JOB, self.profile)
+
+    def reset(self) -> None:
+        """Forgets the checkpoint, so the next run starts from the first book."""
+        apply_changes({"job_state": {self.JOB: None}}, self.profile)
+
+    def _remaining(self, last_id: int) -> List[Dict[str, Any]]:
+        with get_db(self.profile) as conn:
+            cursor = conn.execute(
+                """
+                SELECT * FROM books
+                WHERE id > ? AND (read_date IS NULL OR read_date = '')
+                ORDER BY id
+                """,
+                (last_id,),
+            )
+            return [dict(row) for row in cursor]
+
+    def check(self, book: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Looks a book up again and returns the fields that changed.
+
+        The word count is only filled in when the book has none, since it may
+        have been entered by hand rather than estimated from the page count.
+        The score is included whenever another field changed.
+
+        Raises:
+            LookupError: If the book could not be found.
+        """
+        isbn = validate_isbn(book["isbn"] or "")
+        record = self.client.fetch_book(isbn or book["title"], isbn, refresh=True)
+        if not record:
+            raise LookupError("No metadata found")
+
+        changed = {}
+        rating = float(record["rating"] or 0)
+        if rating and rating != float(book["rating"] or 0):
+            changed["rating"] = rating
+        if record["length"] and not book["length"]:
+            changed["length"] = record["length"]
+
+        if changed:
+            score = calculate_book_score({**book, **changed}, self.config)
+            if score != book["score"]:
+                changed["score"] = score
+        return changed
+
+    def run(
+        self,
+        on_progress: Optional[Callable[[int, int, str, Optional[str]], None]] = None,
+        on_batch: Optional[Callable[[list], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Checks every remaining book, resuming from the checkpoint if any.
+
+        Args:
+            on_progress: Called as (checked, total, title, error) after each
+                book; error is None when the lookup succeeded.
+            on_batch: Called with the written (id, fields) updates.
+            should_stop: Polled between books; returning True saves the
+                checkpoint and returns.
+
+        Returns:
+            Dict[str, Any]: "checked", "updated" and "total" over the whole
+            walk, "failed" list of (title, error) for this run, "elapsed"
+            seconds, "finished" (False when stopped early) and the
+            "requests" and "retries" made during this run.
+        """
+        requests_before, retries_before = self.client.request_totals()
+        started = time.perf_counter()
+        state = self.checkpoint() or {"last_id": 0, "checked": 0, "updated": 0}
+        books = self._remaining(state["last_id"])
+        state["total"] = state["checked"] + len(books)
+        failed = []
+        updates = []
+
+        def flush(done=False):
+            batch = list(updates)
+            updates.clear()
+            # A finished walk clears its checkpoint along with the last batch
+            checkpoint = None if done else dict(state)
+            apply_changes({"update": batch, "job_state": {self.JOB: checkpoint}}, self.profile)
+            if batch and on_batch:
+                on_batch(batch)
+
+        finished = True
+        pending = 0
+        for book in books:
+            if should_stop and should_stop():
+                finished = False
+                break
+            error = None
+            try:
+                if changed := self.check(book):
+                    updates.append((book["id"], changed))
+                    state["updated"] += 1
+            except Exception as e:
+                error = str(e)
+                failed.append((book["title"], error))
+
+            state["last_id"] = book["id"]
+            state["checked"] += 1
+            pending += 1
+            if on_progress:
+                on_progress(state["checked"], state["total"], book["title"], error)
+            if pending >= self.batch_size:
+                flush()
+                pending = 0
+        flush(done=finished)
+
+        requests, retries = self.client.request_totals()
+        return {
+            "checked": state["checked"],
+            "updated": state["updated"],
+            "total": state["total"],
+            "failed": failed,
+            "elapsed": time.perf_counter() - started,
+            "finished": finished,
+            "requests": requests - requests_before,
+            "retries": retries - retries_before,
+        }
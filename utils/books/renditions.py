@@ -0,0 +1,103 @@
+from io import BytesIO
+from typing import Dict, Iterable, Optional, Tuple
+
+from PIL import Image
+
+from utils.common.constants import COVER_FORMATS, COVER_QUALITY
+
+Size = Tuple[int, int]
+
+# Bounding boxes, smallest first: list thumbnails, the cover label, and the
+# cover label on a 2x display
+RENDITIONS: Dict[str, Size] = {
+    "thumb": (120, 180),
+    "detail": (400, 600),
+    "hidpi": (800, 1200),
+}
+
+
+def pick_rendition(size: Optional[Size], available: Optional[Iterable[str]] = None) -> str:
+    """
+    The smallest rendition that covers size, or the largest there is.
+
+    size None asks for the detail rendition. available limits the choice,
+    e.g. to what is stored for a cover.
+    """
+    names = [name for name in RENDITIONS if available is None or name in set(available)]
+    if not names:
+        raise ValueError("No renditions to choose from")
+    if size is None:
+        return "detail" if "detail" in names else names[-1]
+    for name in names:
+        box = RENDITIONS[name]
+        if box[0] >= size[0] and box[1] >= size[1]:
+            return name
+    return names[-1]
+
+
+def fit(source: Size, box: Size) -> Size:
+    """source scaled down to fit in box with its aspect ratio kept, never up."""
+    scale = min(box[0] / source[0], box[1] / source[1], 1.0)
+    return max(1, round(source[0] * scale)), max(1, round(source[1] * scale))
+
+
+def decode(data: bytes, box: Size, reduced: bool = True) -> Image.Image:
+    """
+    Decodes an image at the smallest size that still covers box.
+
+    JPEGs are decoded by libjpeg at 1/2, 1/4 or 1/8 scale through draft, so
+    the full-size bitmap is never built. Other formats are decoded in full
+    and shrunk by an integer factor with reduce, which is much cheaper than
+    a resampling filter. reduced=False decodes in full, for comparison.
+    """
+    image = Image.open(BytesIO(data))
+    if reduced and image.format == "JPEG":
+        image.draft("RGB", fit(image.size, box))
+    image = image.convert("RGB")
+    factor = min(image.width // box[0], image.height // box[1])
+    if reduced and factor >= 2:
+        image = image.reduce(factor)
+    return image
+
+
+def largest_box(renditions: Optional[Dict[str, Size]] = None) -> Size:
+    """The biggest rendition box, i.e. the most of an image that is ever kept."""
+    return max((renditions or RENDITIONS).values(), key=lambda box: box[0] * box[1])
+
+
+def make_renditions(
+    data: bytes,
+    renditions: Optional[Dict[str, Size]] = None,
+    reduced: bool = True,
+    format: str = "jpeg",
+    quality: int = COVER_QUALITY,
+) -> Dict[str, Tuple[bytes, int, int]]:
+    """
+    Renders an image at every rendition size from a single decode.
+
+    Each rendition keeps the source's aspect ratio and is never larger than
+    the source, so a small source may yield identical renditions.
+
+    Args:
+        format (str): Key of COVER_FORMATS to encode the renditions in.
+        quality (int): Encoder quality, 1-100.
+
+    Returns:
+        Dict[str, Tuple[bytes, int, int]]: Encoded data, width and height by
+        rendition name.
+    """
+    encoder, _, options = COVER_FORMATS[format]
+    renditions = renditions or RENDITIONS
+    source = decode(data, largest_box(renditions), reduced)
+
+    rendered = {}
+    # Largest first, each made from the one before, so every resize is small
+    image = source
+    for name, box in sorted(renditions.items(), key=lambda item: item[1][0] * item[1][1], reverse=True):
+        size = fit(image.size, box)
+        if size != image.size:
+            image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        buffer = BytesIO()
+        image.save(buffer, format=encoder, quality=quality, **options)
+        rendered[name] = (buffer.getvalue(), *image.size)
+    return rendered
@@ -1,8 +1,14 @@
 from utils.core.config import load_config
+from utils.core.db import split_tags
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the engine falls back to plain Python
+    np = None
 
-def calculate_rating_score(rating):
-    config = load_config()
+
+def calculate_rating_score(rating, config=None):
+    config = config or load_config()
     try:
         rating = float(rating) if isinstance(rating, str) else rating
         difference_from_baseline = rating - config["rating"]["baseline"]
@@ -13,8 +19,8 @@ def calculate_rating_score(rating):
         return 0
 
 
-def calculate_length_score(length):
-    config = load_config()
+def calculate_length_score(length, config=None):
+    config = config or load_config()
     try:
         words = int(length) if isinstance(length, str) else length
         word_difference = abs(config["length"]["target"] - words)
@@ -26,13 +32,149 @@ def calculate_length_score(length):
         return 0
 
 
-def calculate_book_score(book):
-    rating_score = calculate_rating_score(book["rating"])
-    length_score = calculate_length_score(book["length"])
+def calculate_book_score(book, config=None):
+    config = config or load_config()
+    rating_score = calculate_rating_score(book["rating"], config)
+    length_score = calculate_length_score(book["length"], config)
     return round(rating_score + length_score, 2)
 
 
-def calculate_scores(books):
-    for book in books:
-        book["score"] = calculate_book_score(book)
+class BookColumns:
+    """
+    Columnar view of a list of books for batch scoring.
+
+    Values that the per-book functions would reject are stored as None so
+    both engines can give them the same zero score.
+    """
+
+    def __init__(self, books):
+        self.ratings = [self._number(book.get("rating"), float) for book in books]
+        self.lengths = [self._number(book.get("length"), int) for book in books]
+        self.members = [book.get("member") for book in books]
+        self.tags = [split_tags(book.get("tags")) for book in books]
+
+    def __len__(self):
+        return len(self.ratings)
+
+    @staticmethod
+    def _number(value, parse):
+        try:
+            value = parse(value) if isinstance(value, str) else value
+        except ValueError:
+            return None
+        return value if isinstance(value, (int, float)) else None
+
+
+def _rating_scores_python(ratings, baseline, multiplier):
+    return [
+        0 if rating is None else max(round((rating - baseline) * multiplier, 2), 0)
+        for rating in ratings
+    ]
+
+
+def _length_scores_python(lengths, target, step):
+    return [
+        0 if words is None else -(abs(target - words) + (step - 1)) // step
+        for words in lengths
+    ]
+
+
+def _rating_scores_numpy(ratings, baseline, multiplier):
+    valid = np.array([rating is not None for rating in ratings], dtype=bool)
+    values = np.array([rating or 0 for rating in ratings], dtype=np.float64)
+    raw = ((values - baseline) * multiplier).tolist()
+    # round() stays in Python: np.round is not correctly rounded and could
+    # differ from the per-book functions in the last decimal
+    return [max(round(x, 2), 0) if ok else 0 for x, ok in zip(raw, valid.tolist())]
+
+
+def _length_scores_numpy(lengths, target, step):
+    if step == 0:
+        raise ZeroDivisionError("penalty_step must not be zero")
+    scores = [0] * len(lengths)
+    # Integer and float lengths are scored separately so each keeps its type
+    for kind, dtype in ((int, np.int64), (float, np.float64)):
+        indexes = [i for i, words in enumerate(lengths) if isinstance(words, kind)]
+        if indexes:
+            values = np.array([lengths[i] for i in indexes], dtype=dtype)
+            results = (-(np.abs(target - values) + (step - 1)) // step).tolist()
+            for i, score in zip(indexes, results):
+                scores[i] = score
+    return scores
+
+
+def score_columns(columns, config=None):
+    """
+    Scores every book in a BookColumns view in one pass.
+
+    Equivalent to calculate_book_score for each book, but the config is read
+    once and the arithmetic is vectorized with NumPy when it is installed.
+
+    Returns:
+        list: One score per book, in column order.
+    """
+    config = config or load_config()
+    baseline = config["rating"]["baseline"]
+    multiplier = config["rating"]["multiplier"]
+    target = config["length"]["target"]
+    step = config["length"]["penalty_step"]
+
+    if np is not None and len(columns):
+        rating_scores = _rating_scores_numpy(columns.ratings, baseline, multiplier)
+        length_scores = _length_scores_numpy(columns.lengths, target, step)
+    else:
+        rating_scores = _rating_scores_python(columns.ratings, baseline, multiplier)
+        length_scores = _length_scores_python(columns.lengths, target, step)
+
+    return [
+        round(rating + length, 2) for rating, length in zip(rating_scores, length_scores)
+    ]
+
+
+def adjust_score(score, member, tags, penalties, tag_adjustments):
+    """Applies member penalties and tag adjustments to one score."""
+    score = float(score)
+    if member in penalties:
+        score += penalties[member]
+    for tag in tags:
+        if tag in tag_adjustments:
+            score += tag_adjustments[tag]
+    return score
+
+
+def adjust_columns(columns, scores, penalties, tag_adjustments):
+    """
+    Applies member penalties and tag adjustments to a batch of scores.
+
+    Adjustments are added in the same order as selection.adjust_scores
+    (member first, then each tag in turn) so float results match exactly.
+
+    Returns:
+        list: The adjusted scores as floats.
+    """
+    if np is None or not len(columns):
+        return [
+            adjust_score(score, member, tags, penalties, tag_adjustments)
+            for score, member, tags in zip(scores, columns.members, columns.tags)
+        ]
+
+    adjusted = np.array(scores, dtype=np.float64)
+    adjusted += np.array(
+        [penalties.get(member, 0) for member in columns.members], dtype=np.float64
+    )
+    # One column per tag position keeps the per-book addition order
+    for position in range(max(map(len, columns.tags), default=0)):
+        adjusted += np.array(
+            [
+                tag_adjustments.get(tags[position], 0) if position < len(tags) else 0
+                for tags in columns.tags
+            ],
+            dtype=np.float64,
+        )
+    return adjusted.tolist()
+
+
+def calculate_scores(books, config=None):
+    for book, score in zip(books, score_columns(BookColumns(books), config)):
+        book["score"] = score
     return books
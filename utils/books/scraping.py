@@ -1,34 +1,245 @@
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
 import os
 from pathlib import Path
+import random
+import threading
 import time
 import re
+from urllib.parse import urlsplit
 import requests
-from bs4 import BeautifulSoup
-from PyQt6.QtGui import QPixmap
-from PIL import Image
-from io import BytesIO
+from requests.adapters import HTTPAdapter
+from PyQt6.QtGui import QImage, QPixmap
 
 
-from utils.core.word_count import clean_page_count, estimate_word_count
+from utils.core.word_count import estimate_word_count
+from utils.common.constants import COVER_FORMATS, COVER_QUALITY
 from utils.core.paths import get_base_dir
 
-class GoodreadsClient:
+from .cover_store import CoverEvictor, CoverStore, cover_keys
+from .metadata_cache import MetadataCache
+from .page_parser import parse_book_page, parse_search_page
+from .pixmap_cache import PixmapCache
+from .providers import MetadataProvider
+from .rate_limit import RateLimiter, TokenBucket
+from .renditions import largest_box, make_renditions, pick_rendition
+from .single_flight import SingleFlight
+
+class GoodreadsClient(MetadataProvider):
+
+    name = "goodreads"
 
     BASE_URL = "https://www.goodreads.com"
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
-    # year
-    CACHE_MAX_AGE = 365 * 24 * 60 * 60  
-
-    def __init__(self):
+    # Throttling and transient server errors worth another try
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    # Image hosts that serve a cover scaled to a size named in the file name,
+    # e.g. 12067._SY475_.jpg, and the name modifiers they understand
+    SIZED_IMAGE_HOSTS = ("media-amazon.com", "ssl-images-amazon.com", "gr-assets.com")
+    IMAGE_MODIFIERS = re.compile(r"(\._[A-Z0-9_,]+_)?\.(jpe?g|png|gif|webp)$", re.IGNORECASE)
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        max_per_host: int = 4,
+        metadata_cache: Optional[MetadataCache] = None,
+        timeout=(5, 20),
+        rate: float = 2.0,
+        burst: int = 5,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        pixmap_budget: int = 64 * 1024 * 1024,
+        cover_cache_bytes: int = 200 * 1024 * 1024,
+        cover_cache_images: int = 5000,
+        cover_format: str = "jpeg",
+        cover_quality: int = COVER_QUALITY,
+        cover_pack: bool = False,
+    ):
+        """
+        Args:
+            base_url (str, optional): Site to scrape instead of BASE_URL, e.g. a
+                local stand-in server.
+            max_per_host (int): Most requests in flight to one host at a time,
+                across every thread sharing this client.
+            metadata_cache (MetadataCache, optional): Cache for search results
+                and parsed book pages; defaults to cache/metadata.db.
+            timeout: Seconds to wait to connect and to read, as for requests.
+            rate (float): Requests per second allowed to each host on average.
+            burst (int): Requests a host may get at once before rate applies.
+            max_retries (int): Extra attempts after a 429, a 5xx or a network error.
+            backoff (float): Base delay for the exponential backoff, in seconds.
+            max_backoff (float): Longest single delay between attempts.
+            pixmap_budget (int): Bytes of decoded covers get_cover keeps in memory.
+            cover_cache_bytes (int): Size the cover store is kept under on disk.
+            cover_cache_images (int): Most covers the store keeps on disk,
+                counting all of a cover's renditions as one.
+            cover_format (str): Format covers are stored in, "jpeg"
+                (progressive) or "webp".
+            cover_quality (int): Encoder quality for stored covers, 1-100.
+            cover_pack (bool): Keep covers in one pack file rather than a
+                file each; existing covers are moved over in the background.
+        """
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.max_per_host = max_per_host
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate, burst)
+        # Extra limits on one thread's requests, set by throttled
+        self._throttle = threading.local()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Concurrent lookups of the same book, or downloads of the same cover, share one fetch
+        self._book_flights = SingleFlight()
+        self._cover_flights = SingleFlight()
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
+        # The host slots cap concurrency, so each host's pool never needs more
+        # connections than that; pool_connections covers the site and its image CDNs
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max_per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.cache_dir = Path(get_base_dir()) / "cache" / "covers"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        # Run cleanup on initialization
-        self.cleanup_cache()
+        self.cover_store = CoverStore(self.cache_dir, pack=cover_pack)
+        # Least recently used covers beyond the limits are deleted in the
+        # background; the app starts it once it is up, and every save nudges it
+        self.cover_evictor = CoverEvictor(
+            self.cover_store, cover_cache_bytes, cover_cache_images
+        )
+        self.metadata_cache = metadata_cache or MetadataCache(
+            self.cache_dir.parent / "metadata.db"
+        )
+        self.pixmap_cache = PixmapCache(pixmap_budget)
+        if cover_format not in COVER_FORMATS:
+            raise ValueError(f"Unknown cover format: {cover_format}")
+        self.cover_format = cover_format
+        self.cover_quality = cover_quality
+        self._cover_bytes_lock = threading.Lock()
+        self._covers_downloaded = 0
+        self._cover_bytes_downloaded = 0
+        self._cover_bytes_stored = 0
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    @contextmanager
+    def throttled(self, rate: float, burst: int = 1) -> Iterator[TokenBucket]:
+        """
+        Limits the calling thread's requests to rate per second, on top of
+        the host's limits, while the block runs.
+
+        For slow background jobs sharing the client: requests made from
+        other threads, e.g. books added meanwhile, are not held back.
+        """
+        previous = getattr(self._throttle, "bucket", None)
+        self._throttle.bucket = TokenBucket(rate, burst)
+        try:
+            yield self._throttle.bucket
+        finally:
+            self._throttle.bucket = previous
+
+    def _get(self, url: str, retries: Optional[int] = None) -> requests.Response:
+        """
+        GET a URL within the host's rate and concurrency limits.
+
+        429 and 5xx responses and network errors are retried with exponential
+        backoff and full jitter, honouring Retry-After when the host sends one,
+        up to retries times (max_retries by default).
+        """
+        bucket = self.rate_limiter.bucket(urlsplit(url).netloc)
+        throttle = getattr(self._throttle, "bucket", None)
+        max_retries = self.max_retries if retries is None else retries
+        for attempt in range(max_retries + 1):
+            if throttle:
+                throttle.acquire()
+            bucket.acquire()
+            response = None
+            try:
+                with self._host_slot(url):
+                    response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == max_retries:
+                    bucket.record_failure()
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                if attempt == max_retries:
+                    bucket.record_failure()
+                    response.raise_for_status()
+
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+            if response is not None and (retry_after := self._retry_after(response)):
+                delay = min(retry_after, self.max_backoff)
+            if response is not None and response.status_code == 429:
+                # Throttled: hold back every thread talking to this host
+                bucket.pause(delay)
+            bucket.record_retry()
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        try:
+            return max(float(response.headers.get("Retry-After", "")), 0)
+        except ValueError:
+            return None
+
+    def request_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Rate limiter state per host, for reporting throughput of bulk jobs."""
+        return self.rate_limiter.stats()
+
+    def request_totals(self) -> Tuple[int, int]:
+        """Requests and retries made so far across every host, for diffing around a job."""
+        stats = self.request_stats()
+        return (
+            sum(host["requests"] for host in stats.values()),
+            sum(host["retries"] for host in stats.values()),
+        )
+
+    def coalescing_stats(self) -> Dict[str, Dict[str, int]]:
+        """Book lookups and cover downloads saved by joining one already in flight."""
+        return {"book": self._book_flights.stats(), "cover": self._cover_flights.stats()}
+
+    def cover_stats(self) -> Dict[str, Any]:
+        """Bytes downloaded and stored for the covers fetched so far, in total and per cover."""
+        with self._cover_bytes_lock:
+            covers = self._covers_downloaded
+            downloaded, stored = self._cover_bytes_downloaded, self._cover_bytes_stored
+        return {
+            "covers": covers,
+            "format": self.cover_format,
+            "quality": self.cover_quality,
+            "bytes_downloaded": downloaded,
+            "bytes_stored": stored,
+            "downloaded_per_cover": downloaded / covers if covers else 0.0,
+            "stored_per_cover": stored / covers if covers else 0.0,
+        }
+
+    def cached_cover_count(self) -> int:
+        """Images in the cover store, plus covers still saved under their old names."""
+        return self.cover_store.stats()["images"] + len(list(self.cache_dir.glob("*.jpg")))
+
+    def clear_covers(self) -> int:
+        """
+        Deletes every cached cover, on disk and in memory, returning how many
+        images there were. A pack is started afresh by the next cover saved.
+        """
+        removed = self.cover_store.clear()
+        for path in self.cache_dir.glob("*.jpg"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        self.pixmap_cache.clear()
+        return removed
 
     def _is_isbn(self, query: str) -> bool:
         return query.isdigit() and len(query) == 13
@@ -38,68 +249,104 @@ class GoodreadsClient:
     ) -> Optional[str]:
         # First try ISBN if provided
         if isbn and self._is_isbn(isbn):
-            return f"{self.BASE_URL}/book/isbn/{isbn}"
+            return f"{self.base_url}/book/isbn/{isbn}"
 
         # Then try query as ISBN
         if self._is_isbn(query):
-            return f"{self.BASE_URL}/book/isbn/{query}"
+            return f"{self.base_url}/book/isbn/{query}"
 
-        # Fall back to title search
-        search_url = f"{self.BASE_URL}/search?q={query.replace(' ', '+')}"
+        # Fall back to title search, cached under the normalized query
+        search_url = f"{self.base_url}/search?q={'+'.join(query.lower().split())}"
 
-        try:
-            return self.create_book_url(search_url)
-        except Exception as e:
-            print(f"Error getting book page URL: {e}")
-            return None
+        return self.metadata_cache.lookup(
+            "url", search_url, lambda: self.create_book_url(search_url)
+        )
 
     def create_book_url(self, search_url):
-        response = self.session.get(search_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        book_link = soup.select_one("a.bookTitle")
-        if not book_link or not (book_url := book_link.get("href")):
+        response = self._get(search_url)
+        if not (book_url := parse_search_page(response.text)):
             return None
 
-        return f"{self.BASE_URL}{book_url}"
+        return f"{self.base_url}{book_url}"
 
-    def get_book_info(
-        self, query: str, isbn: Optional[str] = None
+    def fetch_book(
+        self, query: str, isbn: Optional[str] = None, refresh: bool = False
     ) -> Optional[Dict[str, Any]]:
+        """
+        Resolves, downloads and parses a book page once for every consumer.
+
+        With refresh=True the page is downloaded even if a cached record is
+        still fresh; the resolved book URL is still taken from the cache.
+
+        Returns:
+            Optional[Dict[str, Any]]: The page record (url, title, author,
+            rating, pages, length, cover_url) plus the isbn, or None if the
+            book could not be found.
+
+        Raises:
+            requests.RequestException: If the site could not be reached or
+                kept failing, so callers can tell that apart from not found.
+        """
+        key = (isbn or " ".join(query.lower().split()), refresh)
+        return self._book_flights.do(key, lambda: self._fetch_book(query, isbn, refresh))
+
+    def _fetch_book(self, query, isbn, refresh):
         book_url = self._get_book_page_url(query, isbn)
         if not book_url:
             return None
 
         try:
-            return self.extract_book_info(book_url, isbn)
-        except Exception as e:
-            print(f"Error fetching book info: {e}")
-            return None
+            record = self._get_page_record(book_url, refresh)
+        except requests.HTTPError as e:
+            # Goodreads answers an ISBN it has no book for with 404
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+        return {**record, "isbn": isbn or None} if record else None
+
+    def get_book_info(
+        self, query: str, isbn: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        book = self.fetch_book(query, isbn)
+        return self._book_info(book) if book else None
 
     def extract_book_info(self, book_url, isbn):
-        response = self.session.get(book_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        record = self._get_page_record(book_url)
+        return self._book_info({**record, "isbn": isbn or None}) if record else None
+
+    @staticmethod
+    def _book_info(book: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "title": book["title"],
+            "author": book["author"],
+            "rating": book["rating"],
+            "isbn": book["isbn"],
+            "length": book["length"],
+        }
 
-        title = soup.select_one("h1[data-testid='bookTitle']")
-        author = soup.select_one("span.ContributorLink__name")
-        rating = soup.select_one("div.RatingStatistics__rating")
-        pages = soup.select_one("p[data-testid='pagesFormat']")
+    def _get_page_record(
+        self, book_url: str, refresh: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        load = self.metadata_cache.refresh if refresh else self.metadata_cache.lookup
+        return load("page", book_url, lambda: self._parse_book_page(book_url))
 
-        if not title:
+    def _parse_book_page(self, book_url):
+        response = self._get(book_url)
+        if not (book := parse_book_page(response.text)):
             return None
 
         # Calculate estimated word count if page count is available
-        page_count = clean_page_count(pages.text) if pages else 0
+        page_count = book["pages"]
         word_count = estimate_word_count(page_count) if page_count else 0
 
         return {
-            "title": title.text.strip(),
-            "author": author.text.strip() if author else "Unknown Author",
-            "rating": float(rating.text.strip()) if rating else 0.0,
-            "isbn": isbn or None,
+            "url": book_url,
+            "title": book["title"],
+            "author": book["author"] or "Unknown Author",
+            "rating": book["rating"],
+            "pages": page_count,
             "length": word_count,  # Add estimated word count
+            "cover_url": book["cover_url"],
         }
 
     def _clean_filename(self, title: str, author: str, isbn: Optional[str] = None) -> str:
@@ -113,97 +360,214 @@ class GoodreadsClient:
             return f"{clean_title}_{clean_author}_{isbn}".replace(' ', '_')
         return f"{clean_title}_{clean_author}".replace(' ', '_')
 
-    def _get_cache_path(self, title: str, author: str, isbn: Optional[str] = None) -> Path:
-        """Get the cache path for the cover image."""
-        filename = self._clean_filename(title, author, isbn) + ".jpg"
-        return self.cache_dir / filename
-
-    def _load_cached_cover(self, title: str, author: str, isbn: Optional[str] = None) -> Optional[QPixmap]:
-        """Load the cached cover image using the correct file path."""
-        cache_path = self._get_cache_path(title, author, isbn)
-        if cache_path.exists():
-            # Update access time when loading from cache
-            os.utime(cache_path, None)
-            pixmap = QPixmap()
-            if pixmap.load(str(cache_path)):
-                return pixmap
-        return None
+    def _cover_key(self, title: str, author: str, isbn: Optional[str] = None) -> str:
+        """The key a cover is known by in memory and while it is being fetched."""
+        return cover_keys(title, author, isbn)[0]
 
+    def _import_legacy_cover(self, title: str, author: str, isbn: Optional[str] = None) -> bool:
+        """Moves a cover cached before the store, named after the title and author, into it."""
+        legacy_path = self.cache_dir / (self._clean_filename(title, author, isbn) + ".jpg")
+        if not legacy_path.exists():
+            return False
+        if not self._save_cover_to_cache(title, author, legacy_path.read_bytes(), isbn):
+            return False
+        legacy_path.unlink()
+        return True
+
+    def _has_cover(self, title: str, author: str, isbn: Optional[str] = None) -> bool:
+        return self.cover_store.contains(title, author, isbn) or self._import_legacy_cover(
+            title, author, isbn
+        )
+
+    def _load_cached_cover(
+        self,
+        title: str,
+        author: str,
+        isbn: Optional[str] = None,
+        size: Optional[Tuple[int, int]] = None,
+    ) -> Optional[QPixmap]:
+        """Load the cached rendition nearest to size from the cover store."""
+        data = self.cover_store.read(title, author, isbn, size)
+        if data is None and self._import_legacy_cover(title, author, isbn):
+            data = self.cover_store.read(title, author, isbn, size)
+        if data is None:
+            return None
+        # A packed cover is a view of the pack's mapping, decoded without a copy
+        image = QImage()
+        if not image.loadFromData(data):
+            return None
+        return QPixmap.fromImage(image)
 
-    def _save_cover_to_cache(self, title: str, author: str, image_data: bytes, isbn: Optional[str] = None) -> bool:
-        try:
-            # Open the image using Pillow
-            image = Image.open(BytesIO(image_data))
 
-            # Resize the image to 400x600
-            resized_image = image.resize((400, 600), Image.Resampling.LANCZOS)
+    def _save_cover_to_cache(
+        self, title: str, author: str, image_data: bytes, isbn: Optional[str] = None
+    ) -> Optional[Dict[str, Tuple[bytes, int, int]]]:
+        """
+        Stores a cover as renditions, returning them, or None if the image
+        could not be decoded or saved.
 
-            # Save the image with the appropriate filename
-            cache_path = self._get_cache_path(title, author, isbn)
-            resized_image.save(cache_path, format='JPEG')
-            print(f"Saved cover to cache: {cache_path}")
-            return True
+        This is the only place a downloaded cover is decoded: once, at
+        reduced size, with every rendition rendered from that.
+        """
+        try:
+            renditions = make_renditions(
+                image_data, format=self.cover_format, quality=self.cover_quality
+            )
+
+            # Save the renditions under their content hashes
+            ext = COVER_FORMATS[self.cover_format][1]
+            digests = self.cover_store.put(title, author, isbn, renditions, ext)
+            stored = sum(len(data) for data, _, _ in renditions.values())
+            print(
+                f"Saved cover to cache: {title} ({digests['detail'][:12]},"
+                f" {len(image_data)} bytes in, {stored} bytes stored)"
+            )
+            self.cover_evictor.start()
+            return renditions
         except Exception as e:
             print(f"Error saving resized cover to cache: {e}")
-            return False
+            return None
 
         
-    def cleanup_cache(self):
-        """Remove cached covers that haven't been accessed in CACHE_MAX_AGE seconds."""
-        try:
-            current_time = time.time()
-            removed = 0
-            for cache_file in self.cache_dir.glob("*.jpg"):
-                # Get last access time of the file
-                last_access = os.path.getatime(cache_file)
-                if current_time - last_access > self.CACHE_MAX_AGE:
-                    cache_file.unlink()
-                    removed += 1
-            if removed > 0:
-                print(f"Removed {removed} old covers from cache")
-        except Exception as e:
-            print(f"Error during cache cleanup: {e}")
+    def get_cover(
+        self,
+        title: str,
+        author: str,
+        isbn: Optional[str] = None,
+        book: Optional[Dict[str, Any]] = None,
+        size: Optional[Tuple[int, int]] = None,
+        download: bool = True,
+    ) -> Optional[QPixmap]:
+        """
+        Returns a book's cover, from memory, the disk cache or the web.
+
+        Pass the record from fetch_book as book to reuse its cover URL
+        instead of looking the book up again, and size as (width, height)
+        to get the nearest rendition scaled to fit it, aspect ratio kept.
+        Renditions and their scaled sizes are kept in pixmap_cache, so
+        showing a cover again decodes nothing.
+
+        With download=False a cover that is not cached yet gives None rather
+        than a wait on the web; the GUI thread uses it and has cache_cover
+        fetch the cover on a worker.
+        """
+        key = (self._cover_key(title, author, isbn), pick_rendition(size))
+        if (pixmap := self.pixmap_cache.get(key, size)) is None:
+            if not (pixmap := self._load_cover(title, author, isbn, book, size, download)):
+                return None
+            self.pixmap_cache.put(key, pixmap)
+            if size:
+                pixmap = self.pixmap_cache.put(key, PixmapCache.scale(pixmap, size), size)
+        return pixmap
 
-    def get_cover(self, title: str, author: str, isbn: Optional[str] = None) -> Optional[QPixmap]:
+    def _load_cover(
+        self, title, author, isbn=None, book=None, size=None, download=True
+    ) -> Optional[QPixmap]:
         # First try title cache
         print(f"Checking title cache for: {title}")
-        if cached_cover := self._load_cached_cover(title, author, isbn):
+        if cached_cover := self._load_cached_cover(title, author, isbn, size):
             print(f"Found cover in title cache for: {title}")
             return cached_cover
-
-        print("No cached cover found, fetching from web...")
-        # If not in cache, fetch from web
-        book_url = self._get_book_page_url(title, isbn)
-        if not book_url:
+        if not download:
             return None
 
+        print("No cached cover found, fetching from web...")
         try:
-            return self.extract_cover(book_url, title, author, isbn)
+            renditions = self._download_cover(title, author, isbn, book)
         except Exception as e:
             print(f"Error fetching cover: {e}")
             return None
 
-
-    def extract_cover(self, book_url: str, title: str, author: str, isbn: Optional[str] = None) -> Optional[QPixmap]:
-        response = self.session.get(book_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        img = soup.select_one("div.BookCover__image img.ResponsiveImage")
-        if not img or not (src := img.get("src")):
+        if renditions:
+            # Only the small rendition needed is decoded again, from memory
+            pixmap = QPixmap()
+            if pixmap.loadFromData(renditions[pick_rendition(size, renditions)][0]):
+                return pixmap
             return None
+        # Another flight stored it first, or there is no cover
+        return self._load_cached_cover(title, author, isbn, size)
+
+    def cache_cover(
+        self,
+        title: str,
+        author: str,
+        isbn: Optional[str] = None,
+        book: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Make sure a book's cover is in the disk cache, without creating a QPixmap.
+
+        Safe to call from worker threads, unlike get_cover. Takes the same
+        optional fetch_book record.
+        """
+        if self._has_cover(title, author, isbn):
+            return True
 
-        image_response = self.session.get(src)
-        image_response.raise_for_status()
-        image_data = image_response.content
-
-        # Create pixmap from image data
-        pixmap = QPixmap()
-        if not pixmap.loadFromData(image_data):
+        try:
+            self._download_cover(title, author, isbn, book)
+        except Exception as e:
+            print(f"Error fetching cover: {e}")
+            return False
+        return self.cover_store.contains(title, author, isbn)
+
+    def _download_cover(
+        self, title, author, isbn=None, book=None
+    ) -> Optional[Dict[str, Tuple[bytes, int, int]]]:
+        """
+        Downloads a cover and saves it to the cache, returning its renditions.
+
+        Returns None if the cover was stored in the meantime, or there is
+        none. Concurrent calls for the same cover wait for the first one,
+        keyed by its most specific store key, so the cover is fetched and
+        written once.
+        """
+
+        def download():
+            # An earlier flight may have saved it since the caller looked
+            if self.cover_store.contains(title, author, isbn):
+                return None
+            if not (image_data := self._fetch_cover_data(title, isbn, book)):
+                return None
+            if renditions := self._save_cover_to_cache(title, author, image_data, isbn):
+                with self._cover_bytes_lock:
+                    self._covers_downloaded += 1
+                    self._cover_bytes_downloaded += len(image_data)
+                    self._cover_bytes_stored += sum(len(data) for data, _, _ in renditions.values())
+            return renditions
+
+        return self._cover_flights.do(self._cover_key(title, author, isbn), download)
+
+    def _fetch_cover_data(self, title, isbn=None, book=None) -> Optional[bytes]:
+        book = book or self.fetch_book(title, isbn)
+        if not book or not book.get("cover_url"):
             return None
+        url = book["cover_url"]
+        if (sized_url := self._sized_cover_url(url)) != url:
+            # Not retried: the original is as good, and asking for it beats
+            # waiting out a backoff on a resize that is failing
+            try:
+                return self._get(sized_url, retries=0).content
+            except requests.RequestException as e:
+                print(f"Sized cover not available, fetching the original: {e}")
+        return self._get(url).content
+
+    def _sized_cover_url(self, url: str) -> str:
+        """
+        The URL of the cover scaled to the largest rendition's height.
+
+        Goodreads covers are full-size scans, often several times larger
+        than anything we keep; their image hosts scale one to the height
+        named in the file name, which is all the renditions need. Other
+        URLs are returned as they are.
+        """
+        parts = urlsplit(url)
+        if not parts.netloc.endswith(self.SIZED_IMAGE_HOSTS):
+            return url
+        path, found = self.IMAGE_MODIFIERS.subn(
+            lambda match: f"._SY{largest_box()[1]}_.{match.group(2)}", parts.path
+        )
+        return parts._replace(path=path).geturl() if found else url
 
-        # Cache the cover with the appropriate filename
-        self._save_cover_to_cache(title, author, image_data, isbn)
-
-        return pixmap
-
+    def extract_cover(self, book_url: str, title: str, author: str, isbn: Optional[str] = None) -> Optional[QPixmap]:
+        record = self._get_page_record(book_url)
+        return self.get_cover(title, author, isbn, record) if record else None
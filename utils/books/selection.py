@@ -1,7 +1,16 @@
-from utils.core.config import load_config
-from utils.core.db import get_db
+import json
+from functools import lru_cache
 
-from .scoring import calculate_book_score, calculate_scores
+from utils.core.config import DEFAULT_CONFIG, load_config
+from utils.core.db import connections, get_db, split_tags
+
+from .scoring import (BookColumns, adjust_columns, adjust_score,
+                      calculate_book_score, calculate_scores)
+
+
+def title_key(title):
+    """Normalized title used to spot books that have already been selected."""
+    return (title or "").lower().strip()
 
 
 def get_selected_books():
@@ -16,11 +25,11 @@ def get_selected_books():
         return [dict(row) for row in cursor.fetchall()]
 
 
-def get_member_penalties(books=None):
+def get_member_penalties(books=None, config=None):
     if books is None:
         books = get_selected_books()
 
-    config = load_config()
+    config = config or load_config()
     penalties = {}
     recent_selections = books[:3]
 
@@ -36,11 +45,11 @@ def get_member_penalties(books=None):
     return penalties
 
 
-def get_tag_adjustments(books=None):
+def get_tag_adjustments(books=None, config=None):
     if books is None:
         books = get_selected_books()
 
-    config = load_config()
+    config = config or load_config()
     adjustments = {}
     recent_selections = books[:3]
 
@@ -48,7 +57,7 @@ def get_tag_adjustments(books=None):
         if not book.get("tags"):
             continue
             
-        tags = [tag.strip() for tag in book["tags"].split(",")]
+        tags = split_tags(book["tags"])
         adjustment = (
             config["tag_adjustments"]["last_selection"] if i == 0
             else config["tag_adjustments"]["second_last"] if i == 1 else config["tag_adjustments"]["third_last"]
@@ -63,42 +72,28 @@ def get_tag_adjustments(books=None):
     return adjustments
 
 
-def adjust_scores(books, selected_books=None):
+def adjust_scores(books, selected_books=None, config=None):
     if selected_books is None:
         selected_books = get_selected_books()
 
-    penalties = get_member_penalties(selected_books)
-    tag_adjustments = get_tag_adjustments(selected_books)
-
-    adjusted_books = []
-    for book in books:
-        adjusted_book = dict(book)
-        member = adjusted_book["member"]
-        adjusted_book["score"] = float(adjusted_book["score"])
+    config = config or load_config()
+    penalties = get_member_penalties(selected_books, config)
+    tag_adjustments = get_tag_adjustments(selected_books, config)
 
-        # Apply member penalties
-        if member in penalties:
-            penalty = penalties[member]
-            adjusted_book["score"] += penalty
+    columns = BookColumns(books)
+    scores = adjust_columns(
+        columns, [book["score"] for book in books], penalties, tag_adjustments
+    )
+    return [{**book, "score": score} for book, score in zip(books, scores)]
 
-        # Apply tag adjustments
-        if book.get("tags"):
-            book_tags = [tag.strip() for tag in book["tags"].split(",")]
-            for tag in book_tags:
-                if tag in tag_adjustments:
-                    adjusted_book["score"] += tag_adjustments[tag]
 
-        adjusted_books.append(adjusted_book)
-
-    return adjusted_books
-
-
-def select_top_choice(books):
+def select_top_choice(books, selected_books=None, config=None):
     if not books:
         return None
 
     # Get already selected books and create a set of their titles
-    selected_books = get_selected_books()
+    if selected_books is None:
+        selected_books = get_selected_books()
     selected_titles = {book["title"].lower().strip() for book in selected_books}
 
     # Filter out any books that have already been selected
@@ -113,5 +108,163 @@ def select_top_choice(books):
         return None
 
     # Calculate adjusted scores for remaining books
-    adjusted_books = adjust_scores(available_books, selected_books)
-    return max(adjusted_books, key=lambda book: book["score"])
\ No newline at end of file
+    adjusted_books = adjust_scores(available_books, selected_books, config)
+    return max(adjusted_books, key=lambda book: book["score"])
+
+
+@lru_cache(maxsize=16)
+def _decode(text):
+    return json.loads(text)
+
+
+def register_selection_functions(conn):
+    """
+    Registers the scoring rules as SQL functions on a connection.
+
+    book_score(rating, length, config) matches calculate_book_score, and
+    adjusted_score(score, member, tags, adjustments) applies the penalties
+    and tag adjustments the way adjust_scores does. The config and the
+    [penalties, tag_adjustments] pair are passed as JSON, decoded once per
+    distinct value, so the functions are registered once per connection
+    rather than on every query. title_key(title) and word_count(length)
+    expose the normalization used for filtering.
+    """
+    conn.create_function(
+        "book_score",
+        3,
+        lambda rating, length, config: calculate_book_score(
+            {"rating": rating, "length": length}, _decode(config)
+        ),
+        deterministic=True,
+    )
+    conn.create_function(
+        "adjusted_score",
+        4,
+        lambda score, member, tags, adjustments: adjust_score(
+            score, member, split_tags(tags), *_decode(adjustments)
+        ),
+        deterministic=True,
+    )
+    conn.create_function("title_key", 1, title_key, deterministic=True)
+    conn.create_function(
+        "word_count", 1, lambda length: BookColumns._number(length, int), deterministic=True
+    )
+
+
+connections.add_open_hook(register_selection_functions)
+
+
+def selection_constraints(config):
+    """
+    select_top_candidates keyword arguments for the config's selection
+    section, where a word bound of 0 means no bound.
+    """
+    selection = config.get("selection", DEFAULT_CONFIG["selection"])
+    return {
+        "min_length": selection["min_words"] or None,
+        "max_length": selection["max_words"] or None,
+        "exclude_members": selection["exclude_members"],
+        "required_tags": selection["required_tags"],
+    }
+
+
+def matches_constraints(
+    book, min_length=None, max_length=None, exclude_members=(), required_tags=()
+):
+    """Whether a book passes the filters select_top_candidates applies in SQL."""
+    length = BookColumns._number(book.get("length"), int)
+    if min_length is not None and (length is None or length < min_length):
+        return False
+    if max_length is not None and (length is None or length > max_length):
+        return False
+    if book.get("member") in exclude_members:
+        return False
+    tags = split_tags(book.get("tags"))
+    return all(tag in tags for tag in required_tags)
+
+
+def select_top_candidates(
+    limit=1,
+    min_length=None,
+    max_length=None,
+    exclude_members=(),
+    required_tags=(),
+    config=None,
+    profile=None,
+):
+    """
+    Ranks the unselected books inside SQLite and returns only the best ones.
+
+    Applies the same rules as select_top_choice, with the scores computed by
+    SQL functions so a single query filters, scores and sorts the library.
+    Books with an unknown word count are left out when a length bound is set.
+
+    Args:
+        limit (int): How many candidates to return.
+        min_length (int, optional): Minimum word count.
+        max_length (int, optional): Maximum word count.
+        exclude_members (Iterable[str]): Members whose books are skipped.
+        required_tags (Iterable[str]): Tags a book must all carry.
+
+    Returns:
+        list: Book dictionaries, best first, with "score" set to the adjusted score.
+    """
+    config = config or load_config(profile)
+    conditions = [
+        "(read_date IS NULL OR read_date = '')",
+        """title_key(title) NOT IN (
+            SELECT title_key(title) FROM books
+            WHERE read_date IS NOT NULL AND read_date != ''
+        )""",
+    ]
+    params = []
+    if min_length is not None:
+        conditions.append("word_count(length) >= ?")
+        params.append(min_length)
+    if max_length is not None:
+        conditions.append("word_count(length) <= ?")
+        params.append(max_length)
+    if exclude_members := list(exclude_members):
+        placeholders = ", ".join("?" * len(exclude_members))
+        conditions.append(f"member NOT IN ({placeholders})")
+        params.extend(exclude_members)
+    for tag in required_tags:
+        conditions.append(
+            "EXISTS (SELECT 1 FROM book_tags WHERE book_id = books.id AND tag = ?)"
+        )
+        params.append(tag)
+
+    with get_db(profile) as conn:
+        recent = [
+            dict(row)
+            for row in conn.execute(
+                """
+                SELECT * FROM books
+                WHERE read_date IS NOT NULL AND read_date != ''
+                ORDER BY read_date DESC, id DESC
+                LIMIT 3
+                """
+            )
+        ]
+        adjustments = [get_member_penalties(recent, config), get_tag_adjustments(recent, config)]
+        cursor = conn.execute(
+            f"""
+            SELECT *, adjusted_score(book_score(rating, length, ?), member, tags, ?) AS ranked_score
+            FROM books
+            WHERE {" AND ".join(conditions)}
+            ORDER BY ranked_score DESC, id
+            LIMIT ?
+            """,
+            (
+                json.dumps(config, sort_keys=True),
+                json.dumps(adjustments, sort_keys=True),
+                *params,
+                limit,
+            ),
+        )
+        books = []
+        for row in cursor.fetchall():
+            book = dict(row)
+            book["score"] = book.pop("ranked_score")
+            books.append(book)
+        return books
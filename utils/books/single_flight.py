@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for its result, or its exception, instead of repeating the
+    work. Once the call finishes the key is free again.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.saved = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+            if (future := self._flights.get(key)) is not None:
+                self.saved += 1
+                leader = False
+            else:
+                future = self._flights[key] = Future()
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Calls made, calls that did the work, and calls saved by waiting on another."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executed": self.calls - self.saved,
+                "saved": self.saved,
+                "in_flight": len(self._flights),
+            }
@@ -12,6 +12,16 @@ DEFAULT_PROFILE = "default"
 WINDOW_MIN_WIDTH = 910
 WINDOW_MIN_HEIGHT = 850
 
+# Covers
+# Formats covers can be stored in: Pillow encoder, file extension and
+# encoder options. Progressive JPEGs are a few percent smaller than baseline
+# ones; WebP is a good deal smaller again at the same quality.
+COVER_FORMATS = {
+    "jpeg": ("JPEG", "jpg", {"progressive": True, "optimize": True}),
+    "webp": ("WEBP", "webp", {"method": 4}),
+}
+COVER_QUALITY = 80
+
 # Time constants
 DATE_FORMAT = "%Y-%m-%d"
 DATE_FORMAT_MAIN = "%d %B, %Y"
\ No newline at end of file
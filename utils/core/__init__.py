@@ -2,4 +2,5 @@ from .paths import *
 from .dates import *
 from .config import *
 from .db import *
-from .profile import *
\ No newline at end of file
+from .profile import *
+from .repository import *
@@ -0,0 +1,221 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, List, Optional
+
+import aiosqlite
+from PyQt6.QtCore import QCoreApplication, QObject, pyqtSignal
+
+from utils.common.constants import DB_FILE, DEFAULT_PROFILE
+
+from .db import (ConnectionManager, change_statements, connections, get_db,
+                 search_statement)
+from .paths import get_file_path
+
+_connections: Dict[str, aiosqlite.Connection] = {}
+# One task at a time per connection: batches sharing a connection would
+# otherwise share its implicit transaction, so one batch's commit or rollback
+# would take the other's statements with it, and a read in between would see
+# rows that are not committed yet
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def _connect(profile: str) -> aiosqlite.Connection:
+    # The sync manager runs the schema migrations once per profile
+    with get_db(profile):
+        pass
+    conn = await aiosqlite.connect(get_file_path(DB_FILE, profile))
+    conn.row_factory = aiosqlite.Row
+    for pragma, value in ConnectionManager.PRAGMAS.items():
+        await conn.execute(f"PRAGMA {pragma} = {value}")
+    return conn
+
+
+@asynccontextmanager
+async def locked_async_db(profile=None) -> AsyncIterator[aiosqlite.Connection]:
+    """
+    The profile's shared aiosqlite connection, held by one task at a time
+    and opened on first use.
+
+    Must be entered on the AsyncRunner loop, which owns the connections.
+    """
+    profile = profile or DEFAULT_PROFILE
+    async with _locks.setdefault(profile, asyncio.Lock()):
+        if profile not in _connections:
+            _connections[profile] = await _connect(profile)
+        yield _connections[profile]
+
+
+async def get_async_db(profile=None) -> aiosqlite.Connection:
+    """
+    Returns the shared aiosqlite connection for a profile, opening it on first use.
+
+    Use locked_async_db instead to run statements on it.
+    """
+    async with locked_async_db(profile) as conn:
+        return conn
+
+
+async def close_async_db(profile=None) -> None:
+    profile = profile or DEFAULT_PROFILE
+    # Under the lock, so a task in progress finishes before the connection goes
+    async with _locks.setdefault(profile, asyncio.Lock()):
+        if conn := _connections.pop(profile, None):
+            await conn.close()
+
+
+async def close_all_async_db() -> None:
+    for profile in list(_connections):
+        await close_async_db(profile)
+
+
+async def async_query(sql: str, params=(), profile=None) -> List[Dict[str, Any]]:
+    """Runs a read-only query and returns the rows as dictionaries."""
+    async with locked_async_db(profile) as conn:
+        async with conn.execute(sql, params) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+
+async def async_read_db(profile=None) -> List[Dict[str, Any]]:
+    """Async counterpart of read_db."""
+    return await async_query("SELECT * FROM books", profile=profile)
+
+
+async def async_search_books(
+    query: str, limit: Optional[int] = 50, offset: int = 0, profile=None
+) -> List[Dict[str, Any]]:
+    """Async counterpart of search_books."""
+    fts = await _has_full_text_search(profile)
+    if not (statement := search_statement(query, limit, offset, fts)):
+        return []
+    return await async_query(*statement, profile=profile)
+
+
+async def async_search_ids(query: str, profile=None) -> set:
+    """Ids of every book matching a search, unordered; for filtering views."""
+    fts = await _has_full_text_search(profile)
+    if not (statement := search_statement(query, None, 0, fts, ids_only=True)):
+        return set()
+    return {row["id"] for row in await async_query(*statement, profile=profile)}
+
+
+async def _has_full_text_search(profile=None) -> bool:
+    return bool(
+        await async_query(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'",
+            profile=profile,
+        )
+    )
+
+
+async def async_apply_changes(batch: Dict[str, Any], profile=None) -> List[int]:
+    """Async counterpart of apply_changes; returns the inserted ids."""
+    statements = change_statements(batch)
+    lastrowid = None
+    async with locked_async_db(profile) as conn:
+        try:
+            try:
+                while True:
+                    sql, params = statements.send(lastrowid)
+                    cursor = await conn.execute(sql, params)
+                    lastrowid = cursor.lastrowid
+            except StopIteration as done:
+                new_ids = done.value
+            await conn.commit()
+        except Exception as e:
+            # Also when the commit itself fails, so the connection is not
+            # left in the middle of a transaction
+            await conn.rollback()
+            print(f"Error updating database: {e}")
+            raise
+    return new_ids
+
+
+class AsyncRunner(QObject):
+    """
+    Runs coroutines on a dedicated event-loop thread.
+
+    Completion callbacks are delivered back on the thread that owns the
+    runner (the GUI thread), so they can safely touch widgets.
+    """
+
+    _finished = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="fabularasa-db", daemon=True
+        )
+        self._thread.start()
+        self._finished.connect(self._deliver)
+
+    def submit(
+        self,
+        coro: Coroutine,
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+        def done(future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            result = None if error else future.result()
+            self._finished.emit((on_done, on_error), result, error)
+
+        future.add_done_callback(done)
+        return future
+
+    def _deliver(self, callbacks, result, error):
+        on_done, on_error = callbacks
+        if error:
+            if on_error:
+                on_error(error)
+            else:
+                print(f"Database task failed: {error}")
+        elif on_done:
+            on_done(result)
+
+    def run(self, coro: Coroutine, timeout: float = 5) -> Any:
+        """Blocks until the coroutine has finished on the runner's loop."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def close_profile(self, profile=None) -> None:
+        # Not waited for: the close queues behind any batch still running,
+        # which must not hold up the GUI thread
+        if not self._loop.is_running():
+            return
+        future = asyncio.run_coroutine_threadsafe(close_async_db(profile), self._loop)
+
+        # Reported from the loop rather than through a signal, as the runner
+        # may be gone by the time a close at exit finishes
+        def done(future):
+            if not future.cancelled() and (error := future.exception()):
+                print(f"Error closing database: {error}")
+
+        future.add_done_callback(done)
+
+    def shutdown(self, timeout: float = 5) -> None:
+        if not self._loop.is_running():
+            return
+        self.run(close_all_async_db(), timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+
+_runner: Optional[AsyncRunner] = None
+
+
+def get_async_runner() -> AsyncRunner:
+    """Returns the application-wide runner, creating it on first use."""
+    global _runner
+    if _runner is None:
+        _runner = AsyncRunner()
+        # Profiles being switched, renamed or restored must release both connections
+        connections.add_close_hook(_runner.close_profile)
+        # aiosqlite's worker threads would otherwise keep the process alive
+        if app := QCoreApplication.instance():
+            app.aboutToQuit.connect(_runner.shutdown)
+    return _runner
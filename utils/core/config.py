@@ -1,6 +1,12 @@
+import contextlib
+import copy
 import json
 import os
-from typing import Any, Dict
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.common.constants import DEFAULT_PROFILE
 
 from .paths import get_file_path
 
@@ -9,34 +15,118 @@ DEFAULT_CONFIG = {
     "length": {"target": 50000, "penalty_step": 2000},
     "member_penalties": {"last_selection": -15, "second_last": -10, "third_last": -5},
     "tag_adjustments": {"last_selection": 0, "second_last": 0, "third_last": 0},
+    # Filters on the books Select picks from; 0 words means no bound
+    "selection": {"min_words": 0, "max_words": 0, "exclude_members": [], "required_tags": []},
 }
 
 
+# Parsed configs keyed by path, with the (mtime, size) they were read at
+_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+_lock = threading.Lock()
+
+
 def get_config_path(profile=None) -> str:
     return get_file_path("config.json", profile)
 
 
+def _file_key(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
 def load_config(profile=None) -> Dict[str, Any]:
+    """
+    Returns the profile's config, re-reading config.json only when its
+    modification time or size has changed since the last read.
+
+    A config.json that is not valid JSON is renamed to config.json.bad and
+    replaced by the defaults.
+    """
     config_path = get_config_path(profile)
+    key = _file_key(config_path)
+
+    with _lock:
+        cached = _cache.get(config_path)
+    if key and cached and cached[0] == key:
+        return copy.deepcopy(cached[1])
 
     try:
         with open(config_path, "r") as f:
             config = json.load(f)
-            # Add tag_adjustments if missing
-            if "tag_adjustments" not in config:
-                config["tag_adjustments"] = DEFAULT_CONFIG["tag_adjustments"]
-                save_config(config, profile)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError):
+    except FileNotFoundError:
         save_config(DEFAULT_CONFIG, profile)
-        return DEFAULT_CONFIG
+        return copy.deepcopy(DEFAULT_CONFIG)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        # Keep the unreadable file for the user to repair; only start over
+        # with the defaults once it is safely out of the way
+        backup_path = f"{config_path}.bad"
+        print(f"Error reading {config_path}: {e}")
+        try:
+            os.replace(config_path, backup_path)
+        except OSError as e:
+            print(f"Could not move it aside, using the default config: {e}")
+            return copy.deepcopy(DEFAULT_CONFIG)
+        print(f"Moved it to {backup_path}")
+        save_config(DEFAULT_CONFIG, profile)
+        return copy.deepcopy(DEFAULT_CONFIG)
+
+    # Configs from older versions lack tag_adjustments and selection; fill them in memory only
+    for section in ("tag_adjustments", "selection"):
+        if section not in config:
+            config[section] = copy.deepcopy(DEFAULT_CONFIG[section])
+
+    with _lock:
+        _cache[config_path] = (key, config)
+    return copy.deepcopy(config)
 
 
 def save_config(config: Dict[str, Any], profile=None) -> None:
+    """
+    Writes the config atomically and notifies config listeners.
+
+    The JSON goes to a temporary file in the same directory which then
+    replaces config.json, so a crash never leaves a truncated file behind.
+    """
     config_path = get_config_path(profile)
+    directory = os.path.dirname(config_path)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".config-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(config, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, config_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise
+
+    with _lock:
+        _cache[config_path] = (_file_key(config_path), copy.deepcopy(config))
+        listeners = list(_listeners)
+    for listener in listeners:
+        listener(profile or DEFAULT_PROFILE, copy.deepcopy(config))
 
-    with open(config_path, "w") as f:
-        json.dump(config, f, indent=4)
+
+def add_config_listener(listener: Callable[[str, Dict[str, Any]], None]) -> None:
+    """
+    Register a callback run with (profile, config) after every save_config.
+
+    It runs on the thread that saved, which may be a worker's.
+    """
+    with _lock:
+        _listeners.append(listener)
+
+
+def remove_config_listener(listener: Callable[[str, Dict[str, Any]], None]) -> None:
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
 
 
 def validate_config(config: Dict[str, Any]) -> bool:
@@ -54,6 +144,12 @@ def validate_config(config: Dict[str, Any]) -> bool:
                 "second_last": (int, float),
                 "third_last": (int, float),
             },
+            "selection": {
+                "min_words": int,
+                "max_words": int,
+                "exclude_members": list,
+                "required_tags": list,
+            },
         }
 
         def check_structure(data, structure):
@@ -72,6 +168,10 @@ def validate_config(config: Dict[str, Any]) -> bool:
                         return False
             return True
 
-        return check_structure(config, required_structure)
+        if not check_structure(config, required_structure):
+            return False
+        # 0 means no bound, so only a set maximum can be below the minimum
+        selection = config["selection"]
+        return not selection["max_words"] or selection["min_words"] <= selection["max_words"]
     except Exception:
         return False
\ No newline at end of file
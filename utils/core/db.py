@@ -1,54 +1,267 @@
+import atexit
+import json
+import re
 import sqlite3
+import threading
 from contextlib import contextmanager
-from typing import Any, Dict, Generator, List
+from typing import Any, Callable, Dict, Generator, List, Optional
 
-from utils.common.constants import DB_FILE
+from utils.common.constants import DB_FILE, DEFAULT_PROFILE
 
 from .paths import get_file_path
 
+BOOK_COLUMNS = (
+    "title",
+    "author",
+    "isbn",
+    "tags",
+    "length",
+    "rating",
+    "member",
+    "score",
+    "date_added",
+    "read_date",
+)
+
+
+def _migration_create_books(conn) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            isbn TEXT,
+            tags TEXT,
+            length INTEGER NOT NULL,
+            rating REAL NOT NULL DEFAULT 0,
+            member TEXT NOT NULL,
+            score REAL NOT NULL DEFAULT 0,
+            date_added TEXT NOT NULL,
+            read_date TEXT
+        )
+        """
+    )
+    # Databases created before isbn/tags existed are missing those columns
+    cursor = conn.execute("PRAGMA table_info(books)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if "isbn" not in columns:
+        conn.execute("ALTER TABLE books ADD COLUMN isbn TEXT")
+    if "tags" not in columns:
+        conn.execute("ALTER TABLE books ADD COLUMN tags TEXT")
+
+
+def split_tags(tags: Optional[str]) -> List[str]:
+    """Split a comma-separated tags string into stripped, non-empty tags."""
+    return [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
+
+
+def _migration_indexes_and_tags(conn) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_books_read_date ON books(read_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_books_member ON books(member)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_books_title_key ON books(lower(trim(title)))"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS book_tags (
+            book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (book_id, tag)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_book_tags_tag ON book_tags(tag)")
+    _rebuild_book_tags(conn)
+
+
+def _rebuild_book_tags(conn) -> None:
+    conn.execute("DELETE FROM book_tags")
+    conn.executemany(
+        "INSERT OR IGNORE INTO book_tags (book_id, tag) VALUES (?, ?)",
+        [
+            (row["id"], tag)
+            for row in conn.execute("SELECT id, tags FROM books")
+            for tag in split_tags(row["tags"])
+        ],
+    )
+
+
+def _migration_full_text_search(conn) -> None:
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                title, author, tags, isbn,
+                content='books', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        # SQLite builds without FTS5 fall back to LIKE in search_books
+        print(f"Full-text search unavailable: {e}")
+        return
+
+    # One execute per trigger: executescript would commit migrate's transaction
+    for trigger in (
+        """
+        CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, title, author, tags, isbn)
+            VALUES (new.id, new.title, new.author, new.tags, new.isbn);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author, tags, isbn)
+            VALUES ('delete', old.id, old.title, old.author, old.tags, old.isbn);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS books_fts_update
+        AFTER UPDATE OF title, author, tags, isbn ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author, tags, isbn)
+            VALUES ('delete', old.id, old.title, old.author, old.tags, old.isbn);
+            INSERT INTO books_fts (rowid, title, author, tags, isbn)
+            VALUES (new.id, new.title, new.author, new.tags, new.isbn);
+        END
+        """,
+    ):
+        conn.execute(trigger)
+    conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+
+def _migration_job_state(conn: sqlite3.Connection) -> None:
+    # Checkpoints of long-running jobs, so they can resume after a restart
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_state (
+            name TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+
+
+# Each migration runs once per database; its position is the schema version
+# recorded in PRAGMA user_version once it has been applied.
+MIGRATIONS = [
+    _migration_create_books,
+    _migration_indexes_and_tags,
+    _migration_full_text_search,
+    _migration_job_state,
+]
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """Apply any migrations newer than the database's user_version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class ConnectionManager:
+    """Keeps one long-lived, migrated connection open per profile."""
+
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,  # KiB
+        "mmap_size": 64 * 1024 * 1024,
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    }
+
+    def __init__(self):
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._open_hooks: List[Callable[[sqlite3.Connection], None]] = []
+        self._close_hooks: List[Callable[[str], None]] = []
+        self.lock = threading.RLock()
+
+    def add_open_hook(self, hook: Callable[[sqlite3.Connection], None]) -> None:
+        """
+        Register a callback run on each connection as it is opened, e.g. to
+        add SQL functions. Connections already open get it straight away.
+        """
+        with self.lock:
+            self._open_hooks.append(hook)
+            for conn in self._connections.values():
+                hook(conn)
+
+    def add_close_hook(self, hook: Callable[[str], None]) -> None:
+        """Register a callback run after a profile's connection is closed."""
+        self._close_hooks.append(hook)
+
+    def _open(self, profile: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(get_file_path(DB_FILE, profile), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma, value in self.PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        migrate(conn)
+        for hook in self._open_hooks:
+            hook(conn)
+        return conn
+
+    def get(self, profile=None) -> sqlite3.Connection:
+        profile = profile or DEFAULT_PROFILE
+        with self.lock:
+            if profile not in self._connections:
+                self._connections[profile] = self._open(profile)
+            return self._connections[profile]
+
+    def close(self, profile=None) -> None:
+        profile = profile or DEFAULT_PROFILE
+        with self.lock:
+            if conn := self._connections.pop(profile, None):
+                conn.close()
+        # Outside the lock: hooks may wait on threads that need it
+        for hook in self._close_hooks:
+            hook(profile)
+
+    def close_all(self) -> None:
+        with self.lock:
+            profiles = list(self._connections)
+        # Each close takes the lock only to close its connection, not for the hooks
+        for profile in profiles:
+            self.close(profile)
+
+
+connections = ConnectionManager()
+atexit.register(connections.close_all)
+
 
 @contextmanager
 def get_db(profile=None) -> Generator[sqlite3.Connection, None, None]:
     """
     Context manager for accessing the SQLite database.
 
+    The connection is shared and stays open between calls; the block holds
+    the manager's lock so callers on different threads don't interleave.
+
     Yields:
         sqlite3.Connection: Database connection object.
     """
-    conn = sqlite3.connect(get_file_path(DB_FILE, profile))
-    conn.row_factory = sqlite3.Row
+    with connections.lock:
+        yield connections.get(profile)
+
+
+def close_db(profile=None) -> None:
+    """Close a profile's connection, e.g. before its files are moved or replaced."""
+    connections.close(profile)
 
-    try:
-        # Ensure tables are created and schema is updated
-        with conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS books (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    author TEXT NOT NULL,
-                    isbn TEXT,
-                    tags TEXT,
-                    length INTEGER NOT NULL,
-                    rating REAL NOT NULL DEFAULT 0,
-                    member TEXT NOT NULL,
-                    score REAL NOT NULL DEFAULT 0,
-                    date_added TEXT NOT NULL,
-                    read_date TEXT
-                )
-                """
-            )
-            # Add columns if they don't exist
-            cursor = conn.execute("PRAGMA table_info(books)")
-            columns = [col[1] for col in cursor.fetchall()]
-            if "isbn" not in columns:
-                conn.execute("ALTER TABLE books ADD COLUMN isbn TEXT")
-            if "tags" not in columns:
-                conn.execute("ALTER TABLE books ADD COLUMN tags TEXT")
 
-        yield conn
-    finally:
-        conn.close()
+def checkpoint_db(profile=None) -> None:
+    """Flush the write-ahead log into the main database file."""
+    with get_db(profile) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
 
 def read_db(db_file_or_profile=None, profile=None) -> List[Dict[str, Any]]:
@@ -73,73 +286,287 @@ def read_db(db_file_or_profile=None, profile=None) -> List[Dict[str, Any]]:
         return [dict(row) for row in cursor.fetchall()]
 
 
-def write_db(data: List[Dict[str, Any]], profile=None):
+def normalize_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only known book columns, storing a missing ISBN as "N/A" and missing tags as ""."""
+    row = {key: value for key, value in fields.items() if key in BOOK_COLUMNS}
+    if "isbn" in row and not row["isbn"]:
+        row["isbn"] = "N/A"
+    if "tags" in row and not row["tags"]:
+        row["tags"] = ""
+    return row
+
+
+def change_statements(batch: Dict[str, Any]) -> Generator[tuple, Optional[int], List[int]]:
+    """
+    Yields the (sql, params) statements for a batch of changes.
+
+    The caller executes each statement and sends back the cursor's lastrowid,
+    so the same SQL drives both the sync and the async connection.
+
+    Returns:
+        List[int]: Ids assigned to the inserted books.
+    """
+    # Their book_tags rows go too, through ON DELETE CASCADE
+    for book_id in batch.get("delete", ()):
+        yield "DELETE FROM books WHERE id = ?", (book_id,)
+
+    for book_id, fields in batch.get("update", ()):
+        if row := normalize_fields(fields):
+            assignments = ", ".join(f"{column} = :{column}" for column in row)
+            yield (
+                f"UPDATE books SET {assignments} WHERE id = :id",
+                {**row, "id": book_id},
+            )
+            if "tags" in row:
+                yield "DELETE FROM book_tags WHERE book_id = ?", (book_id,)
+                yield from _tag_statements(book_id, row["tags"])
+
+    new_ids = []
+    for book in batch.get("insert", ()):
+        row = normalize_fields({**dict.fromkeys(BOOK_COLUMNS), **book})
+        row["rating"] = row["rating"] or 0
+        row["score"] = row["score"] or 0
+        new_id = yield (
+            """
+            INSERT INTO books (
+                title, author, isbn, tags, length, rating, member,
+                score, date_added, read_date
+            ) VALUES (
+                :title, :author, :isbn, :tags, :length, :rating, :member,
+                :score, :date_added, :read_date
+            )
+            """,
+            row,
+        )
+        yield from _tag_statements(new_id, row["tags"])
+        new_ids.append(new_id)
+
+    # Job checkpoints commit in the same transaction as the rows they describe
+    for name, state in batch.get("job_state", {}).items():
+        if state is None:
+            yield "DELETE FROM job_state WHERE name = ?", (name,)
+        else:
+            yield (
+                "INSERT OR REPLACE INTO job_state (name, state, updated_at) "
+                "VALUES (?, ?, datetime('now'))",
+                (name, json.dumps(state)),
+            )
+    return new_ids
+
+
+def _tag_statements(book_id: int, tags: Optional[str]):
+    for tag in split_tags(tags):
+        yield "INSERT OR IGNORE INTO book_tags (book_id, tag) VALUES (?, ?)", (book_id, tag)
+
+
+def _run_statements(conn, statements) -> Any:
+    lastrowid = None
+    try:
+        while True:
+            sql, params = statements.send(lastrowid)
+            lastrowid = conn.execute(sql, params).lastrowid
+    except StopIteration as done:
+        return done.value
+
+
+def insert_book(book: Dict[str, Any], profile=None) -> int:
+    """
+    Inserts a single book.
+
+    Args:
+        book (Dict[str, Any]): Book dictionary; any "id" key is ignored.
+
+    Returns:
+        int: The id assigned to the new row.
+    """
+    return apply_changes({"insert": [book]}, profile)[0]
+
+
+def update_book(book_id: int, fields: Dict[str, Any], profile=None) -> None:
+    """
+    Updates the given columns of a single book.
+
+    Args:
+        book_id (int): Primary key of the book to update.
+        fields (Dict[str, Any]): Column values to write; unknown keys are ignored.
+    """
+    apply_changes({"update": [(book_id, fields)]}, profile)
+
+
+def delete_book(book_id: int, profile=None) -> None:
+    """
+    Deletes a single book by id.
+    """
+    apply_changes({"delete": [book_id]}, profile)
+
+
+def apply_changes(batch: Dict[str, Any], profile=None) -> List[int]:
     """
-    Writes a list of books to the database.
+    Applies a batch of row-level changes in a single transaction.
 
     Args:
-        data (List[Dict[str, Any]]): List of book dictionaries to insert.
+        batch (Dict[str, Any]): May contain "insert" (list of book dicts),
+            "update" (list of (id, fields) pairs), "delete" (list of ids) and
+            "job_state" (job name -> checkpoint dict, or None to clear it).
+
+    Returns:
+        List[int]: Ids assigned to the inserted books, in insertion order.
     """
     with get_db(profile) as conn:
         try:
-            update_books_table(conn, data)
+            with conn:
+                return _run_statements(conn, change_statements(batch))
         except Exception as e:
-            conn.execute("ROLLBACK")
             print(f"Error updating database: {e}")
             raise
 
 
-def update_books_table(conn, data):
-    conn.execute("BEGIN TRANSACTION")
-    # Create a temporary table to validate data before replacing
-    conn.execute(
-        """
-                CREATE TEMPORARY TABLE books_temp (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    author TEXT NOT NULL,
-                    isbn TEXT,
-                    tags TEXT,
-                    length INTEGER NOT NULL,
-                    rating REAL NOT NULL DEFAULT 0,
-                    member TEXT NOT NULL,
-                    score REAL NOT NULL DEFAULT 0,
-                    date_added TEXT NOT NULL,
-                    read_date TEXT
-                )
-                """
-    )
-    # Ensure every book has an ISBN and tags
-    for book in data:
-        if "isbn" not in book or not book["isbn"]:
-            book["isbn"] = "N/A"  # Assign default value if missing
-        if "tags" not in book or not book["tags"]:
-            book["tags"] = ""  # Assign empty string if missing
-
-    # Insert data into temporary table
-    conn.executemany(
-        """
-                INSERT INTO books_temp (
-                    title, author, isbn, tags, length, rating, member, 
-                    score, date_added, read_date
-                ) VALUES (
-                    :title, :author, :isbn, :tags, :length, :rating, :member,
-                    :score, :date_added, :read_date
-                )
-                """,
-        data,
+def get_job_state(name: str, profile=None) -> Optional[Dict[str, Any]]:
+    """Returns a job's last checkpoint, or None if it has none."""
+    with get_db(profile) as conn:
+        row = conn.execute("SELECT state FROM job_state WHERE name = ?", (name,)).fetchone()
+    return json.loads(row["state"]) if row else None
+
+
+def get_books_by_tag(tag: str, profile=None) -> List[Dict[str, Any]]:
+    """Returns the books carrying a tag, using the book_tags index."""
+    with get_db(profile) as conn:
+        cursor = conn.execute(
+            """
+            SELECT books.* FROM book_tags
+            JOIN books ON books.id = book_tags.book_id
+            WHERE book_tags.tag = ?
+            """,
+            (tag.strip(),),
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def get_books_by_member(member: str, profile=None) -> List[Dict[str, Any]]:
+    """Returns the books suggested by a member."""
+    with get_db(profile) as conn:
+        cursor = conn.execute("SELECT * FROM books WHERE member = ?", (member,))
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def get_tag_counts(profile=None) -> Dict[str, int]:
+    """Returns every tag in use with the number of books carrying it."""
+    with get_db(profile) as conn:
+        cursor = conn.execute(
+            "SELECT tag, COUNT(*) FROM book_tags GROUP BY tag ORDER BY tag"
+        )
+        return dict(cursor.fetchall())
+
+
+def rename_tag(old_tag: str, new_tag: str, profile=None) -> List[tuple]:
+    """
+    Renames a tag on every book carrying it, in one transaction.
+
+    Only the affected rows, found through the tag index, are rewritten.
+
+    Returns:
+        List[tuple]: (id, {"tags": new_tags}) for each updated book, in the
+        same shape apply_changes takes, so callers can mirror the change.
+    """
+    old_tag, new_tag = old_tag.strip(), new_tag.strip()
+    with get_db(profile) as conn:
+        rows = conn.execute(
+            """
+            SELECT books.id, books.tags FROM book_tags
+            JOIN books ON books.id = book_tags.book_id
+            WHERE book_tags.tag = ?
+            """,
+            (old_tag,),
+        ).fetchall()
+
+        updates = []
+        for row in rows:
+            tags = []
+            for tag in split_tags(row["tags"]):
+                tag = new_tag if tag == old_tag else tag
+                if tag and tag not in tags:
+                    tags.append(tag)
+            updates.append((row["id"], {"tags": ", ".join(tags)}))
+
+        with conn:
+            _run_statements(conn, change_statements({"update": updates}))
+        return updates
+
+
+# bm25 weights for title, author, tags and isbn
+SEARCH_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+
+def search_statement(
+    query: str,
+    limit: Optional[int] = 50,
+    offset: int = 0,
+    fts: bool = True,
+    ids_only: bool = False,
+) -> Optional[tuple]:
+    """
+    Builds the (sql, params) for a book search, or None for an empty query.
+
+    Every word must match, each as a prefix, so results narrow while typing.
+    Without FTS5 the same words are matched with LIKE and results are unranked.
+    With ids_only the statement returns unordered ids, which is all a filter needs.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    limit = -1 if limit is None else limit
+
+    if fts:
+        match = " ".join(f'"{word}"*' for word in words)
+        if ids_only:
+            return (
+                "SELECT rowid AS id FROM books_fts WHERE books_fts MATCH ? LIMIT ? OFFSET ?",
+                (match, limit, offset),
+            )
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+        return (
+            f"""
+            SELECT books.* FROM books_fts
+            JOIN books ON books.id = books_fts.rowid
+            WHERE books_fts MATCH ?
+            ORDER BY bm25(books_fts, {weights})
+            LIMIT ? OFFSET ?
+            """,
+            (match, limit, offset),
+        )
+
+    columns = "title || ' ' || author || ' ' || IFNULL(tags, '') || ' ' || IFNULL(isbn, '')"
+    conditions = " AND ".join(f"({columns}) LIKE ?" for _ in words)
+    selected = "id" if ids_only else "*"
+    return (
+        f"SELECT {selected} FROM books WHERE {conditions} ORDER BY title LIMIT ? OFFSET ?",
+        (*(f"%{word}%" for word in words), limit, offset),
     )
 
-    # Replace the main table with data from the temporary table
-    conn.execute("DELETE FROM books")
-    conn.execute(
-        """
-                INSERT INTO books 
-                SELECT * FROM books_temp
-                """
+
+def has_full_text_search(conn) -> bool:
+    return bool(
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+        ).fetchone()
     )
 
-    conn.execute("COMMIT")
-    conn.execute("DROP TABLE books_temp")
 
-    print(f"Database updated with {len(data)} books.")
\ No newline at end of file
+def search_books(
+    query: str, limit: Optional[int] = 50, offset: int = 0, profile=None
+) -> List[Dict[str, Any]]:
+    """
+    Full-text search over title, author, tags and ISBN, best matches first.
+
+    Args:
+        query (str): Free text; each word is matched as a prefix.
+        limit (Optional[int]): Maximum number of results, or None for all.
+        offset (int): Number of results to skip, for paging.
+
+    Returns:
+        List[Dict[str, Any]]: Matching books as dictionaries.
+    """
+    with get_db(profile) as conn:
+        if not (statement := search_statement(query, limit, offset, has_full_text_search(conn))):
+            return []
+        return [dict(row) for row in conn.execute(*statement).fetchall()]
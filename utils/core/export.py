@@ -14,7 +14,7 @@ from PyQt6.QtWidgets import (QCheckBox, QDialog, QFileDialog, QHBoxLayout,
 
 from utils.common.constants import DATE_FORMAT, DB_FILE
 
-from .db import read_db
+from .db import checkpoint_db, close_db, read_db
 from .paths import (get_data_dir, get_profiles, get_state_file_path,
                     resource_path)
 
@@ -220,6 +220,7 @@ class ExportManagementDialog(QDialog):
 
                     db_path = profile_dir / DB_FILE
                     if db_path.exists():
+                        checkpoint_db(profile)
                         zipf.write(db_path, f"{profile}/books.db")
 
                     config_path = profile_dir / "config.json"
@@ -267,6 +268,7 @@ class ExportManagementDialog(QDialog):
                     current_profile = parent.profile_manager.get_current_profile()
 
                 for profile in profiles:
+                    close_db(profile)
                     profile_dir = Path(get_data_dir(profile))
                     profile_dir.mkdir(parents=True, exist_ok=True)
 
@@ -1,12 +1,34 @@
 import json
 import shutil
-from pathlib import Path
 
-from PyQt6.QtWidgets import (QDialog, QHBoxLayout, QLabel, QLineEdit,
+from PyQt6.QtWidgets import (QCheckBox, QDialog, QHBoxLayout, QLabel, QLineEdit,
                              QMessageBox, QPushButton, QVBoxLayout)
 
-from .paths import (get_base_dir, get_data_dir, get_profiles, get_state_file_path,
-                    resource_path)
+from utils.common.constants import COVER_FORMATS
+
+from .paths import get_data_dir, get_profiles, get_state_file_path, resource_path
+
+DEFAULT_MISC_SETTINGS = {
+    "amazon_address": ".com",
+    "kobo_region": "us/en",
+    "refresh_rate": 30,
+    "cover_memory_mb": 64,
+    "cover_cache_mb": 200,
+    "cover_cache_images": 5000,
+    "cover_format": "jpeg",
+    "cover_quality": 80,
+    "cover_pack": False,
+    "metadata_providers": ["goodreads", "openlibrary"],
+}
+
+
+def load_misc_settings():
+    """Reads misc_settings.json, filling in defaults for missing keys."""
+    try:
+        with open(get_state_file_path("misc_settings.json"), "r") as f:
+            return {**DEFAULT_MISC_SETTINGS, **json.load(f)}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return dict(DEFAULT_MISC_SETTINGS)
 
 
 class MiscSettingsDialog(QDialog):
@@ -36,6 +58,54 @@ class MiscSettingsDialog(QDialog):
         kobo_layout.addWidget(self.kobo_input)
         layout.addLayout(kobo_layout)
 
+        # Rating refresh settings
+        refresh_layout = QVBoxLayout()
+        refresh_layout.addWidget(QLabel("Rating Refresh Rate (requests/min)"))
+        self.refresh_rate_input = QLineEdit(f"{self.settings['refresh_rate']:g}")
+        refresh_layout.addWidget(self.refresh_rate_input)
+        layout.addLayout(refresh_layout)
+
+        # Cover memory settings
+        cover_memory_layout = QVBoxLayout()
+        cover_memory_layout.addWidget(QLabel("Cover Memory (MB, applies after restart)"))
+        self.cover_memory_input = QLineEdit(f"{self.settings['cover_memory_mb']:g}")
+        cover_memory_layout.addWidget(self.cover_memory_input)
+        layout.addLayout(cover_memory_layout)
+
+        # Cover disk cache settings
+        cover_cache_layout = QVBoxLayout()
+        cover_cache_layout.addWidget(QLabel("Cover Cache Limit (MB and covers, applies after restart)"))
+        cover_cache_row = QHBoxLayout()
+        self.cover_cache_input = QLineEdit(f"{self.settings['cover_cache_mb']:g}")
+        cover_cache_row.addWidget(self.cover_cache_input)
+        self.cover_cache_images_input = QLineEdit(f"{self.settings['cover_cache_images']:g}")
+        cover_cache_row.addWidget(self.cover_cache_images_input)
+        cover_cache_layout.addLayout(cover_cache_row)
+        layout.addLayout(cover_cache_layout)
+
+        # Cover storage format settings
+        cover_format_layout = QVBoxLayout()
+        cover_format_layout.addWidget(QLabel("Cover Format and Quality (applies after restart)"))
+        cover_format_row = QHBoxLayout()
+        self.cover_format_input = QLineEdit(self.settings["cover_format"])
+        cover_format_row.addWidget(self.cover_format_input)
+        self.cover_quality_input = QLineEdit(f"{self.settings['cover_quality']:g}")
+        cover_format_row.addWidget(self.cover_quality_input)
+        cover_format_layout.addLayout(cover_format_row)
+        layout.addLayout(cover_format_layout)
+
+        # Cover pack settings
+        self.cover_pack_input = QCheckBox("Keep covers in a single pack file (applies after restart)")
+        self.cover_pack_input.setChecked(bool(self.settings["cover_pack"]))
+        layout.addWidget(self.cover_pack_input)
+
+        # Metadata provider settings
+        providers_layout = QVBoxLayout()
+        providers_layout.addWidget(QLabel("Metadata Providers (in order)"))
+        self.providers_input = QLineEdit(", ".join(self.settings["metadata_providers"]))
+        providers_layout.addWidget(self.providers_input)
+        layout.addLayout(providers_layout)
+
         layout.addStretch()
 
         # Help text
@@ -43,7 +113,9 @@ class MiscSettingsDialog(QDialog):
             """
 Examples:
 Amazon: .co.uk, .de, .fr, .jp
-Kobo: gb/en, de/de, fr/fr, jp/ja"""
+Kobo: gb/en, de/de, fr/fr, jp/ja
+Cover format: jpeg, webp (quality 1-100)
+Providers: goodreads, openlibrary"""
         )
         help_text.setStyleSheet("color: #888;")
         layout.addWidget(help_text)
@@ -66,11 +138,7 @@ Kobo: gb/en, de/de, fr/fr, jp/ja"""
         self.resize(400, 400)
 
     def load_settings(self):
-        try:
-            with open(get_state_file_path("misc_settings.json"), "r") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {"amazon_address": ".com", "kobo_region": "us/en"}
+        return load_misc_settings()
 
     def save_settings(self):
         amazon_address = self.amazon_input.text().strip()
@@ -82,9 +150,73 @@ Kobo: gb/en, de/de, fr/fr, jp/ja"""
         if not kobo_region:
             kobo_region = "us/en"
 
+        try:
+            refresh_rate = float(self.refresh_rate_input.text().strip())
+            if refresh_rate <= 0:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(
+                self, "Error", "Refresh rate must be a positive number of requests per minute!"
+            )
+            return
+
+        try:
+            cover_memory_mb = float(self.cover_memory_input.text().strip())
+            if cover_memory_mb <= 0:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Error", "Cover memory must be a positive number of MB!")
+            return
+
+        try:
+            cover_cache_mb = float(self.cover_cache_input.text().strip())
+            if cover_cache_mb <= 0:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Error", "Cover cache limit must be a positive number of MB!")
+            return
+
+        try:
+            cover_cache_images = int(self.cover_cache_images_input.text().strip())
+            if cover_cache_images <= 0:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(
+                self, "Error", "Cover cache limit must be a positive whole number of covers!"
+            )
+            return
+
+        cover_format = self.cover_format_input.text().strip().lower() or "jpeg"
+        if cover_format not in COVER_FORMATS:
+            QMessageBox.warning(
+                self, "Error", f"Cover format must be one of: {', '.join(COVER_FORMATS)}!"
+            )
+            return
+
+        try:
+            cover_quality = int(self.cover_quality_input.text().strip())
+            if not 1 <= cover_quality <= 100:
+                raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Error", "Cover quality must be a whole number from 1 to 100!")
+            return
+
+        providers = [
+            name.strip().lower() for name in self.providers_input.text().split(",") if name.strip()
+        ]
+
         settings = {
+            **self.settings,
             "amazon_address": amazon_address,
             "kobo_region": kobo_region,
+            "refresh_rate": refresh_rate,
+            "cover_memory_mb": cover_memory_mb,
+            "cover_cache_mb": cover_cache_mb,
+            "cover_cache_images": cover_cache_images,
+            "cover_format": cover_format,
+            "cover_quality": cover_quality,
+            "cover_pack": self.cover_pack_input.isChecked(),
+            "metadata_providers": providers or DEFAULT_MISC_SETTINGS["metadata_providers"],
         }
 
         try:
@@ -97,8 +229,10 @@ Kobo: gb/en, de/de, fr/fr, jp/ja"""
 
     def clear_cache(self):
         try:
-            cache_dir = Path(get_base_dir()) / "cache" / "covers"
-            if cache_dir.exists():
+            # The running client's store, so its open pack and the covers
+            # already in memory go along with the files
+            client = self.parent().book_manager.goodreads_client
+            if client.cached_cover_count():
                 # Ask for confirmation
                 reply = QMessageBox.question(
                     self,
@@ -109,9 +243,7 @@ Kobo: gb/en, de/de, fr/fr, jp/ja"""
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
-                    # Delete all files in the cache directory
-                    for file in cache_dir.glob("*.jpg"):
-                        file.unlink()
+                    client.clear_covers()
                     # QMessageBox.information(self, "Success", "Cache cleared successfully!")
             else:
                 QMessageBox.information(self, "Info", "Cache directory is already empty.")
@@ -10,6 +10,7 @@ from PyQt6.QtWidgets import (QDialog, QHBoxLayout, QInputDialog, QLabel,
 from utils.common.constants import DB_FILE
 
 from .config import DEFAULT_CONFIG, save_config
+from .db import close_db
 from .paths import (get_data_dir, get_profiles, get_profiles_dir,
                     get_state_file_path)
 
@@ -216,6 +217,9 @@ class ProfileManagementDialog(QDialog):
                     )
                     return
 
+                # The open connection would keep the old database file locked
+                close_db(old_name)
+
                 # For Windows case-only changes, use a temporary name first
                 if old_name.lower() == new_name.lower():
                     temp_path = old_path.parent / f"{old_name}_temp"
@@ -228,7 +232,13 @@ class ProfileManagementDialog(QDialog):
                 # Update the profile manager if necessary
                 if self.profile_manager.get_current_profile().lower() == old_name.lower():
                     self.profile_manager.set_current_profile(new_name)
-                    self.parent().setWindowTitle(f"Fabula Rasa - {new_name}")
+                    self.current_profile = new_name
+                    self.current_profile_label.setText(f"Current Profile: {new_name}")
+                    if parent := self.parent():
+                        parent.setWindowTitle(f"Fabula Rasa - {new_name}")
+                        # The repository would otherwise keep writing under the
+                        # old name, recreating its folder with an empty database
+                        parent.book_manager.reload_data()
 
                 # Refresh profile list and select the new profile
                 self.refresh_profile_list()
@@ -279,6 +289,7 @@ class ProfileManagementDialog(QDialog):
                     self.parent().setWindowTitle("Fabula Rasa - default")
                     self.parent().book_manager.reload_data()
 
+                close_db(profile_name)
                 profile_dir = Path(self.profile_manager._get_profile_dir(profile_name))
                 if profile_dir.exists():
                     shutil.rmtree(profile_dir)
@@ -317,6 +328,8 @@ class ProfileManager:
         return self.current_profile
 
     def set_current_profile(self, profile_name: str):
+        if profile_name != self.current_profile:
+            close_db(self.current_profile)
         self.current_profile = profile_name
         self._save_profile_state()
 
@@ -0,0 +1,200 @@
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .async_db import async_apply_changes, async_read_db, get_async_runner
+from .config import add_config_listener, remove_config_listener
+from .db import BOOK_COLUMNS, apply_changes, normalize_fields, read_db, rename_tag
+
+
+class BookRepository(QObject):
+    """
+    In-memory copy of a profile's books, kept in step with the database.
+
+    Books are loaded once per profile. Every change goes through the
+    repository, which writes only the affected rows and then emits a signal
+    so views can patch themselves instead of re-reading the table. The
+    *_async variants run the SQL on the AsyncRunner thread and apply the
+    result on the GUI thread once it is committed.
+    """
+
+    book_added = pyqtSignal(dict)
+    book_updated = pyqtSignal(dict, dict)  # new book, previous book
+    book_removed = pyqtSignal(dict)
+    reset = pyqtSignal()
+    # (profile, config) after every save_config, which may run on any thread;
+    # connect it queued to handle the change on the GUI thread
+    config_saved = pyqtSignal(str, dict)
+
+    # Batches touching more rows than this emit a single reset instead
+    RESET_THRESHOLD = 50
+
+    def __init__(self, profile=None, parent=None, runner=None):
+        super().__init__(parent)
+        self.profile = profile
+        self._runner = runner
+        self._generation = 0  # bumped on every load so stale async loads are dropped
+        self._books: Dict[int, Dict[str, Any]] = {}
+        self._selected: List[tuple] = []  # (read_date, id), ascending
+        self._unselected: Dict[int, None] = {}  # ordered set of ids
+        listener = self.config_saved.emit
+        add_config_listener(listener)
+        # Without a reference to self, so it can run once the object is gone
+        self.destroyed.connect(lambda: remove_config_listener(listener))
+        self.load()
+
+    @property
+    def runner(self):
+        if self._runner is None:
+            self._runner = get_async_runner()
+        return self._runner
+
+    def _replace(self, books):
+        self._books = {}
+        self._selected = []
+        self._unselected = {}
+        for book in books:
+            self._index(book)
+        self.reset.emit()
+
+    def load(self):
+        """Re-read the current profile's books from the database."""
+        self._generation += 1
+        self._replace(read_db(self.profile))
+
+    def load_async(self, on_done: Optional[Callable[[], None]] = None, on_error=None):
+        """Re-read the books off the GUI thread, then emit reset."""
+        self._generation += 1
+        generation = self._generation
+
+        def loaded(books):
+            if generation != self._generation:
+                return
+            self._replace(books)
+            if on_done:
+                on_done()
+
+        self.runner.submit(async_read_db(self.profile), loaded, on_error)
+
+    def set_profile(self, profile, on_done=None, on_error=None):
+        self.profile = profile
+        self.load_async(on_done, on_error)
+
+    def _index(self, book):
+        self._books[book["id"]] = book
+        if book.get("read_date"):
+            insort(self._selected, (book["read_date"], book["id"]))
+        else:
+            self._unselected[book["id"]] = None
+
+    def _unindex(self, book):
+        del self._books[book["id"]]
+        if book.get("read_date"):
+            key = (book["read_date"], book["id"])
+            del self._selected[bisect_left(self._selected, key)]
+        else:
+            del self._unselected[book["id"]]
+
+    def get(self, book_id) -> Optional[Dict[str, Any]]:
+        book = self._books.get(book_id)
+        return dict(book) if book else None
+
+    def books(self) -> List[Dict[str, Any]]:
+        return [dict(book) for book in self._books.values()]
+
+    def selected_books(self) -> List[Dict[str, Any]]:
+        """Books with a read date, oldest first."""
+        return [dict(self._books[book_id]) for _, book_id in self._selected]
+
+    def unselected_books(self) -> List[Dict[str, Any]]:
+        return [dict(self._books[book_id]) for book_id in self._unselected]
+
+    def add(self, book: Dict[str, Any]) -> Dict[str, Any]:
+        return self.apply_changes({"insert": [book]})[0]
+
+    def update(self, book_id: int, fields: Dict[str, Any]) -> None:
+        self.apply_changes({"update": [(book_id, fields)]})
+
+    def remove(self, book_id: int) -> None:
+        self.apply_changes({"delete": [book_id]})
+
+    def rename_tag(self, old_tag: str, new_tag: str) -> None:
+        """Rename a tag across the library through the tag index."""
+        self.merge_changes({"update": rename_tag(old_tag, new_tag, self.profile)})
+
+    def apply_changes(self, batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Persists a batch (see utils.core.db.apply_changes) and mirrors it in memory.
+
+        Returns:
+            List[Dict[str, Any]]: The inserted books, with their new ids.
+        """
+        inserts = list(batch.get("insert", ()))
+        new_ids = apply_changes(batch, self.profile)
+        inserted = [{**book, "id": book_id} for book, book_id in zip(inserts, new_ids)]
+        return self.merge_changes({**batch, "insert": inserted})
+
+    def apply_changes_async(
+        self,
+        batch: Dict[str, Any],
+        on_done: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        """Like apply_changes, but commits on the runner thread; on_done gets the inserted books."""
+        profile = self.profile
+        generation = self._generation
+        inserts = list(batch.get("insert", ()))
+
+        def applied(new_ids):
+            # The batch belongs to a profile we have since switched away from
+            if profile != self.profile:
+                return
+            inserted = [{**book, "id": book_id} for book, book_id in zip(inserts, new_ids)]
+            if generation != self._generation:
+                # Reloaded meanwhile, maybe with the batch already in; merging it
+                # again would index its books twice, so read the table afresh
+                self.load_async(lambda: on_done and on_done(inserted))
+                return
+            added = self.merge_changes({**batch, "insert": inserted})
+            if on_done:
+                on_done(added)
+
+        return self.runner.submit(async_apply_changes(batch, profile), applied, on_error)
+
+    def merge_changes(self, batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Mirror a batch that has already been written, emitting change signals."""
+        deletes = list(batch.get("delete", ()))
+        updates = list(batch.get("update", ()))
+        inserts = list(batch.get("insert", ()))
+        notify = len(deletes) + len(updates) + len(inserts) <= self.RESET_THRESHOLD
+
+        for book_id in deletes:
+            if book := self._books.get(book_id):
+                self._unindex(book)
+                if notify:
+                    self.book_removed.emit(dict(book))
+
+        for book_id, fields in updates:
+            if not (previous := self._books.get(book_id)):
+                continue
+            book = {**previous, **normalize_fields(fields)}
+            self._unindex(previous)
+            self._index(book)
+            if notify:
+                self.book_updated.emit(dict(book), dict(previous))
+
+        added = []
+        for new_book in inserts:
+            book = normalize_fields({**dict.fromkeys(BOOK_COLUMNS), **new_book})
+            book["id"] = new_book["id"]
+            book["rating"] = book["rating"] or 0
+            book["score"] = book["score"] or 0
+            self._index(book)
+            added.append(dict(book))
+            if notify:
+                self.book_added.emit(dict(book))
+
+        if not notify:
+            self.reset.emit()
+        return added